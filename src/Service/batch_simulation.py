@@ -0,0 +1,152 @@
+import numpy as np
+
+from src.board.placement import PlacementEngine
+
+
+class BatchSimulation:
+    """
+    Plays many games in lockstep on a (B, n, n) array: every step fires one shot in each unfinished game.
+    The shooter hunts uniformly on one colour of a checkerboard and targets the untried cells touching the
+    most hits since the last sunk ship, like a ComputerPlayer with the "parity" strategy.
+    Layouts are sampled like PlacementEngine.layout: longest ship first, uniformly among the legal placements.
+    """
+    def __init__(self, games: int, board_size: int, fleet: list, seed: int = None, max_restarts: int = 100):
+        """
+        :param games: The number of games B
+        :type games: int
+        :param board_size: The size of the boards
+        :type board_size: int
+        :param fleet: The lengths of the ships on every board
+        :type fleet: list
+        :param seed: The seed of the random generator
+        :type seed: int
+        :param max_restarts: How many times a board is started over when the ships placed so far leave no room
+            for the next one
+        :type max_restarts: int
+        :raises ValueError: If the fleet cannot be placed
+        """
+        if not fleet:
+            raise ValueError("The fleet does not fit on the board")
+        PlacementEngine(board_size).check_fleet(fleet)
+        if len(fleet) > np.iinfo(np.int8).max:
+            raise ValueError("Too many ships")
+        self.__games = games
+        self.__board_size = board_size
+        self.__fleet = sorted(fleet, reverse=True)
+        self.__rng = np.random.default_rng(seed)
+        self.__max_restarts = max_restarts
+        self.ships = np.zeros((games, board_size, board_size), dtype=np.int8)
+        self.fired = np.zeros((games, board_size, board_size), dtype=bool)
+        self.__targets = np.zeros((games, board_size, board_size), dtype=bool)
+        self.__remaining = np.tile(np.array(self.__fleet, dtype=np.int16), (games, 1))
+        self.shots = np.zeros(games, dtype=np.int32)
+        self.__hunt = (np.add.outer(np.arange(board_size), np.arange(board_size)) % 2 == 0)
+        self.__place_fleets(np.arange(games))
+
+    def __place_fleets(self, games: np.ndarray) -> None:
+        """
+        Place a fleet on each of the given boards, restarting the boards where a ship no longer fits
+        """
+        for _ in range(self.__max_restarts + 1):
+            if not games.size:
+                return
+            self.ships[games] = 0
+            failed = np.zeros(games.size, dtype=bool)
+            for ship_number, length in enumerate(self.__fleet, 1):
+                failed |= ~self.__place_ship(games, ship_number, length)
+            games = games[failed]
+        if games.size:
+            raise ValueError(f"Could not fit ships of lengths {self.__fleet} on the board after "
+                             f"{self.__max_restarts} restarts")
+
+    def __place_ship(self, games: np.ndarray, ship_number: int, length: int) -> np.ndarray:
+        """
+        Place a ship on each of the given boards
+        :return: Whether the ship fitted on each board
+        """
+        n = self.__board_size
+        free = self.ships[games] == 0
+        legal = np.zeros((games.size, 2, n, n), dtype=bool)
+        legal[:, 0, :, :n - length + 1] = self.__windows(free, length, axis=2)
+        if length > 1:
+            # Ships of length 1 are only placed horizontally, as in PlacementEngine
+            legal[:, 1, :n - length + 1, :] = self.__windows(free, length, axis=1)
+        legal = legal.reshape(games.size, -1)
+        placed = legal.any(axis=1)
+        choice = np.argmax(self.__rng.random(legal.shape) * legal, axis=1)
+        vertical, y, x = np.unravel_index(choice, (2, n, n))
+        for offset in range(length):
+            self.ships[games[placed], (y + offset * vertical)[placed], (x + offset * (1 - vertical))[placed]] = \
+                ship_number
+        return placed
+
+    @staticmethod
+    def __windows(free: np.ndarray, length: int, axis: int) -> np.ndarray:
+        """
+        Whether each run of length cells along an axis is free, from a running sum of the free cells
+        """
+        shape = list(free.shape)
+        shape[axis] = 1
+        running = np.concatenate([np.zeros(shape, dtype=np.int16), np.cumsum(free, axis=axis, dtype=np.int16)],
+                                 axis=axis)
+        ends = np.take(running, np.arange(length, free.shape[axis] + 1), axis=axis)
+        starts = np.take(running, np.arange(0, free.shape[axis] - length + 1), axis=axis)
+        return ends - starts == length
+
+    @property
+    def game_over(self) -> np.ndarray:
+        """
+        :return: Whether every ship is sunk, per game
+        :rtype: np.ndarray
+        """
+        return ~self.__remaining.any(axis=1)
+
+    def step(self) -> int:
+        """
+        Fire one shot in every unfinished game
+        :return: The number of games still running after the shot
+        :rtype: int
+        """
+        games = np.flatnonzero(~self.game_over)
+        if not games.size:
+            return 0
+        n = self.__board_size
+        fired = self.fired[games]
+        untried = ~fired
+
+        # Count the target hits around every cell
+        targets = self.__targets[games].astype(np.int8)
+        touching = np.zeros_like(targets)
+        touching[:, 1:, :] += targets[:, :-1, :]
+        touching[:, :-1, :] += targets[:, 1:, :]
+        touching[:, :, 1:] += targets[:, :, :-1]
+        touching[:, :, :-1] += targets[:, :, 1:]
+        touching *= untried
+
+        noise = self.__rng.random(fired.shape)
+        hunt = untried & self.__hunt
+        hunt |= untried & ~hunt.any(axis=(1, 2), keepdims=True)
+        # Target scores are above 1 and outrank every hunt score, ties are broken at random
+        scores = np.where(touching > 0, touching + noise, hunt * noise).reshape(games.size, -1)
+        y, x = np.unravel_index(np.argmax(scores, axis=1), (n, n))
+
+        self.fired[games, y, x] = True
+        self.shots[games] += 1
+        ship = self.ships[games, y, x].astype(np.intp)
+        hit = ship > 0
+        hit_games, hit_ships = games[hit], ship[hit] - 1
+        self.__remaining[hit_games, hit_ships] -= 1
+        sunk = self.__remaining[hit_games, hit_ships] == 0
+        self.__targets[hit_games[~sunk], y[hit][~sunk], x[hit][~sunk]] = True
+        self.__targets[hit_games[sunk]] = False
+        return int((~self.game_over).sum())
+
+    def run(self) -> np.ndarray:
+        """
+        Play every game to the end
+        :return: The number of shots each game took
+        :rtype: np.ndarray
+        """
+        while self.step():
+            pass
+        return self.shots
@@ -1,14 +1,69 @@
 import random
+import time
+from functools import lru_cache
 
-from src.board.board import ShipDirection, ComputerBoard, PlayerBoard
+from src.Service.opening_book import OpeningBook
+from src.Service.placement_habits import PlacementHabits
+from src.Service.strategies import STRATEGIES, create_strategy
+from src.Service.target_queue import TargetQueue
+from src.board.board import Board, ComputerBoard, PlayerBoard
+from src.board.board_types import ShipDirection, ShotOutcome, ShotResult
+from src.board.placement import PlacementEngine
+
+
+@lru_cache(maxsize=1)
+def default_opening_book() -> OpeningBook:
+    """
+    Get the opening book shared by the computer players of this process
+    :return: The opening book in the default cache directory
+    :rtype: OpeningBook
+    """
+    return OpeningBook()
 
 
 class ComputerPlayer:
-    def __init__(self, board: ComputerBoard):
+    def __init__(self, board: ComputerBoard, strategy: str = "weighted", move_time: float = None,
+                 strategy_options: dict = None, opening_book: OpeningBook = None, habits: PlacementHabits = None,
+                 rng: random.Random = random):
+        """
+        :param board: The computer's own board
+        :type board: ComputerBoard
+        :param strategy: How to pick a cell when there is no hit ship to finish off, one of STRATEGIES
+        :type strategy: str
+        :param move_time: Seconds a move may take, None for no limit
+        :type move_time: float
+        :param strategy_options: Keyword arguments of the strategy, e.g. samples and workers for "monte_carlo"
+        :type strategy_options: dict
+        :param opening_book: Where the opening of the strategy is looked up, defaults to default_opening_book()
+        :type opening_book: OpeningBook
+        :param habits: Where the opponent placed ships in past games, blended into the strategy as its prior
+        :type habits: PlacementHabits
+        :param rng: The random generator of the moves, one of its own makes the moves reproducible from its seed
+        :type rng: random.Random
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown AI strategy: {strategy}")
         self.__board = board
         self.__board_size = board.get_size
+        self.__strategy_name = strategy
+        self.__strategy_options = strategy_options or {}
+        self.__rng = rng
+        self.__move_time = move_time
+        self.__strategy = None
+        self.__fallback = None
+        self.__habits = habits
+        self.__prior = None
         self.__hits = set()
-        self.__potential_targets = []
+        self.__shots = []
+        self.__potential_targets = TargetQueue(self.__board_size)
+        self.move_times = []
+        # The opening is read on the first move and followed, in a random orientation, until a shot hits
+        self.__opening_book = opening_book
+        self.__opening = None
+        # Openings are computed without a prior
+        self.__in_opening = habits is None or not habits.games
+        self.__opening_position = 0
+        self.__orientation = rng.randrange(8)
 
     def place_battleships(self, computer_battleships : int, computer_battleships_length: list) -> None:
         """
@@ -18,21 +73,12 @@ class ComputerPlayer:
         :param computer_battleships_length: List of battleship lengths
         :type computer_battleships_length: list
         :return: None
+        :raises ValueError: If the fleet cannot fit on the board
         """
-        for index in range(1, computer_battleships + 1):
-            placed = False
-            while not placed:
-                x = random.randint(0, self.__board_size - 1)
-                y = random.randint(0, self.__board_size - 1)
-                direction = random.choice(list(ShipDirection))
-                #print(_computer_battleships_length)
-                length = random.choice(computer_battleships_length)
-                try:
-                    self.__board.place_battleships(length, x, y, direction, index)
-                    placed = True
-                    computer_battleships_length.remove(length)
-                except ValueError:
-                    continue
+        lengths = computer_battleships_length[:computer_battleships]
+        placements = PlacementEngine(self.__board_size).layout(lengths)
+        for index, (x, y, direction, length) in enumerate(placements, 1):
+            self.__board.place_battleships(length, x, y, direction, index)
 
     def play(self, player_board : PlayerBoard, game) -> tuple:
         """
@@ -44,102 +90,174 @@ class ComputerPlayer:
         :return: Tuple of coordinates for the computer's move
         :rtype: tuple
         """
-        if self.__potential_targets:
-            # Sort potential targets by proximity to other known hits
-            self.__potential_targets.sort(key=lambda coord: self.__count_adjacent_hits(coord), reverse=True)
-            x, y = self.__potential_targets.pop(0)
+        x, y, result = self.fire(player_board)
+        game.ui.print_result(result.hit, "Computer")
+        if result.hit:
+            game.computer_hits += 1
+            if result.sunk:
+                game.ui.print_sunk("Computer")
         else:
-            x, y = self.__get_weighted_random_hit()
-
-        try:
-            hit, boat = player_board.check_hit(x, y)
-            if hit:
-                game.ui.print_result(hit, "Computer")
-                game.computer_hits += 1
-                if player_board.check_ship_sunk(boat):
-                    game.ui.print_sunk("Computer")
-                    self.__potential_targets.clear()  # Clear potential targets if a ship is sunk
-                else:
-                    self.__add_potential_targets(x, y)
-            else:
-                game.ui.print_result(hit, "Computer")
-                game.computer_misses += 1
-        except ValueError:
-            self.play(player_board, game)  # Retry if the move was invalid
+            game.computer_misses += 1
         return x, y
 
-    def __get_weighted_random_hit(self) -> tuple:
+    def fire(self, board: Board) -> tuple:
         """
-        Get a random hit weighted towards the center and corners of the board
+        Pick a cell and fire at it, without going through a UI. Only cells still legal on the board are
+        proposed, so the shot cannot fail.
+        :param board: The board to attack
+        :type board: Board
+        :return: The x and y coordinates of the shot and its result
+        :rtype: tuple
+        :raises ValueError: If every cell was fired at
+        """
+        start = time.perf_counter()
+        # Finish off a hit ship first, the cells touching the most hits first
+        move = self.__potential_targets.pop(self.__hits)
+        x, y = move if move is not None and board.is_legal_move(*move) else self.__get_search_move(start, board)
+        self.move_times.append(time.perf_counter() - start)
+        result = board.check_hit(x, y)
+        self.__observe(x, y, result)
+        return x, y, result
+
+    def __get_search_move(self, start: float, board: Board) -> tuple:
+        """
+        Get a move from the strategy when there is no ship to finish off
+        :param start: When the move started, as time.perf_counter()
+        :type start: float
+        :param board: The board to attack
+        :type board: Board
         :return: Tuple of coordinates for the computer's move
         :rtype: tuple
         """
-        # Weight cells towards the center and corners of the board for initial random hits
-        while True:
-            x = random.choices(range(self.__board_size), weights=self.__combined_weights())[0]
-            y = random.choices(range(self.__board_size), weights=self.__combined_weights())[0]
-            if (x, y) not in self.__hits:
-                self.__hits.add((x, y))
-                return x, y
+        move = self.__get_opening_move()
+        if move is not None and board.is_legal_move(*move):
+            return move
+        deadline = start + self.__move_time if self.__move_time is not None else float("inf")
+        if self.__strategy is None:
+            self.__strategy = self.__create_strategy(self.__strategy_name, self.__strategy_options)
+        move = self.__strategy.choose(deadline)
+        if move is None or not board.is_legal_move(*move):
+            # The strategy has nothing to suggest, e.g. no remaining ship fits anywhere it knows of
+            if self.__fallback is None:
+                self.__fallback = self.__create_strategy("weighted", {})
+            move = self.__fallback.choose(deadline)
+        if move is None or not board.is_legal_move(*move):
+            # Only when the board was fired at behind the computer's back
+            move = board.random_legal_move(self.__rng)
+        if move is None:
+            raise ValueError("No cells left to fire at")
+        return move
 
-    def __add_potential_targets(self, x: int, y: int) -> None:
+    def __get_opening_move(self) -> tuple or None:
         """
-        Add potential targets around a hit to prioritize targeting nearby cells
-        :param x:  x-coordinate of the hit
-        :type x:  int
-        :param y:  y-coordinate of the hit
-        :type y:  int
-        :return: None
+        Get the next move of the opening book while every shot followed it and missed
+        :return: Tuple of coordinates for the computer's move, None once out of the opening
+        :rtype: tuple
         """
-        # Add adjacent cells along the axis of the hit to prioritize likely ship placements
-        potential_moves = [(x-1, y), (x+1, y), (x, y-1), (x, y+1)]
-        for move in potential_moves:
-            if 0 <= move[0] < self.__board_size and 0 <= move[1] < self.__board_size and move not in self.__hits:
-                self.__potential_targets.append(move)
+        if not self.__in_opening:
+            return None
+        if self.__opening is None:
+            if self.__shots:
+                # Shots were made without the book, e.g. in a loaded game
+                self.__in_opening = False
+                return None
+            book = self.__opening_book or default_opening_book()
+            self.__opening = book.get(self.__strategy_name, self.__board_size, self.__board.get_fleet) or []
+        if self.__opening_position >= len(self.__opening):
+            self.__in_opening = False
+            return None
+        return self.__orient(self.__opening[self.__opening_position])
 
-    def __count_adjacent_hits(self, coord: tuple) -> int:
-        """
-        Count the number of adjacent hits to a coordinate
-        :param coord:  Coordinates to check
-        :type coord:  tuple
-        :return:  Number of adjacent hits
-        :rtype:  int
-        """
-        # Count the number of adjacent hits to prioritize targeting cells near clusters of hits
-        x, y = coord
-        adjacent_hits = [(x-1, y), (x+1, y), (x, y-1), (x, y+1)]
-        return sum(1 for adj in adjacent_hits if adj in self.__hits)
+    def __orient(self, cell: int) -> tuple:
+        """
+        Map a cell of the opening to the orientation of this game, one of the 8 symmetries of the board
+        """
+        last = self.__board_size - 1
+        x, y = cell % self.__board_size, cell // self.__board_size
+        if self.__orientation & 1:
+            x = last - x
+        if self.__orientation & 2:
+            y = last - y
+        if self.__orientation & 4:
+            x, y = y, x
+        return x, y
 
-    def __center_weights(self) -> list:
+    def __create_strategy(self, name: str, options: dict):
         """
-        Generate weights for prioritizing the center of the board
-        :return: List of weights for each cell
-        :rtype: list
+        Create a strategy and replay the shots made so far
+        :param name: The name of the strategy
+        :type name: str
+        :param options: Keyword arguments of the strategy
+        :type options: dict
+        :return: The strategy
+        :rtype: TargetingStrategy
+        """
+        if self.__habits is not None and self.__habits.games:
+            if self.__prior is None:
+                self.__prior = self.__habits.prior()
+            options = dict(options, prior=self.__prior)
+        options = {"rng": self.__rng, **options}
+        # Both fleets are made of the same ships
+        strategy = create_strategy(name, self.__board_size, self.__board.get_fleet, **options)
+        for x, y, result in self.__shots:
+            strategy.observe(x, y, result)
+        return strategy
+
+    def __observe(self, x: int, y: int, result: ShotResult) -> None:
         """
-        # Generate weights for prioritizing the center of the board
-        center = self.__board_size // 2
-        return [center - abs(center - i) for i in range(self.__board_size)]
+        Record a shot and pass its result to the target queue and the strategies
+        :param x: x-coordinate of the shot
+        :type x: int
+        :param y: y-coordinate of the shot
+        :type y: int
+        :param result: The result of the shot
+        :type result: ShotResult
+        :return: None
+        """
+        if self.__in_opening:
+            if (self.__opening is None or result.hit
+                    or (x, y) != self.__orient(self.__opening[self.__opening_position])):
+                self.__in_opening = False
+            else:
+                self.__opening_position += 1
+        self.__hits.add((x, y))
+        self.__shots.append((x, y, result))
+        if result.sunk:
+            self.__potential_targets.clear()  # Clear potential targets if a ship is sunk
+        elif result.hit:
+            self.__potential_targets.add_hit(x, y, self.__hits)
+        for strategy in (self.__strategy, self.__fallback):
+            if strategy is not None:
+                strategy.observe(x, y, result)
 
-    def __corner_weights(self) -> list:
-        """
-        Generate weights for prioritizing the corners of the board
-        :return: Returns a list of weights for each cell
-        :rtype: list
-        """
-        # Generate weights for prioritizing corners of the board
-        weights = [1] * self.__board_size
-        weights[0] += 3  # Top-left corner
-        weights[-1] += 3  # Top-right corner
-        weights[self.__board_size // 2] += 2  # Middle rows
-        return weights
+    def resume(self, player_board: PlayerBoard) -> None:
+        """
+        Rebuild what the computer knows from the shots already on the player board, used when a saved game is loaded
+        :param player_board: Player board being attacked
+        :type player_board: PlayerBoard
+        :return: None
+        """
+        ships = {}
+        for ship, x, y, direction, length in player_board.get_placements:
+            for offset in range(length):
+                ships[(x + offset, y) if direction == ShipDirection.HORIZONTAL else (x, y + offset)] = ship
+        hits = {}
+        for x, y, hit in player_board.fired_cells():
+            if hit:
+                hits.setdefault(ships[(x, y)], []).append((x, y))
+            else:
+                self.__observe(x, y, ShotResult(ShotOutcome.MISS, None, False))
+        # Sunk ships first, so only the hits of ships still afloat are left around to finish off
+        for ship, cells in sorted(hits.items(), key=lambda item: not player_board.check_ship_sunk(item[0])):
+            sunk = player_board.check_ship_sunk(ship)
+            for index, (x, y) in enumerate(cells, 1):
+                outcome = ShotOutcome.SUNK if sunk and index == len(cells) else ShotOutcome.HIT
+                self.__observe(x, y, ShotResult(outcome, ship, False))
 
-    def __combined_weights(self) -> list:
+    def close(self) -> None:
         """
-        Combine center and corner weights for better random selection
-        :return: Returns a list of weights for each cell
-        :rtype: list
+        Release the resources held by the strategies, such as process pools
         """
-        # Combine center and corner weights for better random selection
-        center_weights = self.__center_weights()
-        corner_weights = self.__corner_weights()
-        return [cw + cc for cw, cc in zip(center_weights, corner_weights)]
+        for strategy in (self.__strategy, self.__fallback):
+            if strategy is not None:
+                strategy.close()
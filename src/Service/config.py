@@ -0,0 +1,140 @@
+import argparse
+import os
+import re
+from dataclasses import dataclass, fields
+from functools import lru_cache
+
+from src.Service.strategies import STRATEGIES
+from src.board.storage import OPTIONAL_STORAGE_ENGINES, STORAGE_ENGINES
+from src.ui.ui_interface import UI_BACKENDS
+
+SETTINGS_FILE = 'settings.properties'
+ENVIRONMENT_PREFIX = 'BATTLESHIPS_'
+
+_PROFILE_NAME = re.compile(r'^[A-Za-z0-9_-]{0,64}$')
+
+
+@dataclass(frozen=True)
+class GameConfig:
+    """
+    The settings of a game, parsed and validated once. Build it with load_config or config_from_args
+    and pass it to Game and the UIs.
+    """
+    ui: str = 'pygame'
+    board_size: int = 6
+    battleships: int = 4
+    battle_ship_length: tuple = (2, 3, 4)
+    ai_strategy: str = 'weighted'
+    ai_move_time: float = 0.5
+    player_profile: str = 'default'
+    storage: str = 'grid'
+    move_log: str = ''
+
+    def __post_init__(self):
+        """
+        Validate the settings.
+
+        :raises ValueError: If a setting is invalid.
+        """
+        object.__setattr__(self, 'battle_ship_length', tuple(self.battle_ship_length))
+        if self.ui not in UI_BACKENDS:
+            raise ValueError('Invalid ui setting')
+        if self.board_size < 1:
+            raise ValueError('Invalid board size setting')
+        if self.battleships < 1:
+            raise ValueError('Invalid battleships setting')
+        if not self.battle_ship_length or min(self.battle_ship_length) < 1:
+            raise ValueError('Invalid battle ship length setting')
+        if self.ai_strategy not in STRATEGIES:
+            raise ValueError('Invalid AI strategy setting')
+        if self.ai_move_time < 0:
+            raise ValueError('Invalid AI move time setting')
+        if not _PROFILE_NAME.match(self.player_profile):
+            raise ValueError('Invalid player profile setting')
+        if self.storage not in STORAGE_ENGINES and self.storage not in OPTIONAL_STORAGE_ENGINES:
+            raise ValueError('Invalid storage setting')
+
+
+def _convert(name: str, value: str):
+    """
+    Convert the text of a setting to the type of its field.
+
+    :param name: str - The name of the setting.
+    :param value: str - The text of the setting.
+    :return: The typed value.
+    """
+    field_type = {field.name: field.type for field in fields(GameConfig)}[name]
+    try:
+        if field_type is tuple:
+            return tuple(int(length) for length in value.split(','))
+        return field_type(value)
+    except ValueError:
+        raise ValueError(f'Invalid {name.replace("_", " ")} setting') from None
+
+
+def parse_settings(text: str) -> dict:
+    """
+    Parse the key=value lines of a settings file, ignoring blank lines, comments and unknown keys.
+
+    :param text: str - The content of the settings file.
+    :return: dict - The typed value of every setting found.
+    """
+    names = {field.name for field in fields(GameConfig)}
+    settings = {}
+    for line in text.splitlines():
+        line = line.split('#', 1)[0]
+        name, separator, value = line.partition('=')
+        name = name.strip()
+        if separator and name in names:
+            settings[name] = _convert(name, value.strip())
+    return settings
+
+
+def load_config(path: str = SETTINGS_FILE, environ: dict = None, overrides: dict = None) -> GameConfig:
+    """
+    Build the configuration from the settings file, then the BATTLESHIPS_<NAME> environment variables,
+    then the overrides, each one taking precedence over the previous.
+
+    :param path: str - The settings file, missing settings and a missing file keep the defaults.
+    :param environ: dict - The environment, defaults to os.environ.
+    :param overrides: dict - Typed values, e.g. from the command line.
+    :return: GameConfig - The validated configuration.
+    """
+    try:
+        with open(path, 'r') as f:
+            settings = parse_settings(f.read())
+    except FileNotFoundError:
+        settings = {}
+    environ = os.environ if environ is None else environ
+    for field in fields(GameConfig):
+        value = environ.get(ENVIRONMENT_PREFIX + field.name.upper())
+        if value is not None:
+            settings[field.name] = _convert(field.name, value)
+    settings.update({name: value for name, value in (overrides or {}).items() if value is not None})
+    return GameConfig(**settings)
+
+
+@lru_cache(maxsize=1)
+def get_config() -> GameConfig:
+    """
+    Get the configuration of this process, read from the settings file and the environment on the first call only.
+
+    :return: GameConfig - The configuration.
+    """
+    return load_config()
+
+
+def config_from_args(argv: list = None, path: str = SETTINGS_FILE) -> GameConfig:
+    """
+    Build the configuration with command line overrides, e.g. --board-size 8 --ui console.
+
+    :param argv: list - The arguments, defaults to sys.argv[1:].
+    :param path: str - The settings file.
+    :return: GameConfig - The validated configuration.
+    """
+    parser = argparse.ArgumentParser(description='Battleships')
+    for field in fields(GameConfig):
+        parser.add_argument('--' + field.name.replace('_', '-'), dest=field.name,
+                            type=lambda value, name=field.name: _convert(name, value))
+    return load_config(path, overrides=vars(parser.parse_args(argv)))
+
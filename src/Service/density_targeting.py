@@ -0,0 +1,154 @@
+import heapq
+import random
+from collections import Counter
+
+from src.board.placement import line_counts
+
+
+class DensityTargeting:
+    """
+    Probability density targeting: every cell scores how many legal placements of the ships still afloat cover it.
+    Fired cells block placements, hits included, as cells next to hits are handled by the target queue.
+    A shot only touches the placements through its cell, so the scores are updated incrementally from the memoized
+    counts of the stretch of its row and column it can affect, and the best cell is kept at the top of a heap.
+    """
+    def __init__(self, board_size: int, lengths: list, rng: random.Random = random, prior: list = None):
+        """
+        :param board_size: The size of the board being attacked
+        :type board_size: int
+        :param lengths: The lengths of the ships on the board being attacked
+        :type lengths: list
+        :param rng: The random generator used to break ties
+        :type rng: random.Random
+        :param prior: A multiplier per cell y * size + x of the scores, None for no prior
+        :type prior: list
+        """
+        self.__board_size = board_size
+        self.__rng = rng
+        self.__prior = prior
+        self.__fired = bytearray(board_size * board_size)
+        # Bitmasks of the fired cells of every row and column
+        self.__rows = [0] * board_size
+        self.__columns = [0] * board_size
+        self.__ships_left = Counter(length for length in lengths if length <= board_size)
+        self.__density = {length: self.__empty_density(length) for length in self.__ships_left}
+        self.__scores = [0] * (board_size * board_size)
+        for length, density in self.__density.items():
+            count = self.__ships_left[length]
+            scores = self.__scores
+            for cell, value in enumerate(density):
+                scores[cell] += count * value
+        self.__rebuild_heap()
+
+    def __empty_density(self, length: int) -> list:
+        """
+        Count the placements covering every cell of an empty board from the counts of an empty line
+        """
+        size = self.__board_size
+        line = line_counts(size, 0, length)
+        if length == 1:
+            # A ship of length 1 has a single orientation
+            return [1] * (size * size)
+        return [line[x] + line[y] for y in range(size) for x in range(size)]
+
+    def __rebuild_heap(self) -> None:
+        rng = self.__rng
+        scores = self.__scores
+        if self.__prior is not None:
+            # The heap is ordered by the scores scaled by the prior
+            scores = [score * multiplier for score, multiplier in zip(scores, self.__prior)]
+        self.__heap = [(-score, rng.random(), cell) for cell, score in enumerate(scores) if not self.__fired[cell]]
+        heapq.heapify(self.__heap)
+
+    def best(self) -> tuple or None:
+        """
+        Get the untried cell covered by the most placements
+        :return: The x and y coordinates, None if no remaining ship fits anywhere
+        :rtype: tuple
+        """
+        heap = self.__heap
+        scores = self.__scores
+        prior = self.__prior
+        while heap:
+            neg_score, _, cell = heap[0]
+            score = scores[cell] if prior is None else scores[cell] * prior[cell]
+            if self.__fired[cell] or -neg_score != score:
+                heapq.heappop(heap)
+                continue
+            if neg_score == 0:
+                return None
+            return cell % self.__board_size, cell // self.__board_size
+        return None
+
+    def record_shot(self, x: int, y: int) -> None:
+        """
+        Remove the placements through a fired cell
+        :param x: The x coordinate of the shot
+        :type x: int
+        :param y: The y coordinate of the shot
+        :type y: int
+        :return: None
+        """
+        size = self.__board_size
+        cell = y * size + x
+        if self.__fired[cell]:
+            return
+        changed = set()
+        for length, density in self.__density.items():
+            count = self.__ships_left[length]
+            self.__update_line(density, count, length, self.__rows[y], x, y * size, 1, changed)
+            if length > 1:
+                self.__update_line(density, count, length, self.__columns[x], y, x, size, changed)
+        self.__rows[y] |= 1 << x
+        self.__columns[x] |= 1 << y
+        self.__fired[cell] = 1
+
+        rng = self.__rng
+        scores = self.__scores
+        prior = self.__prior
+        for changed_cell in changed:
+            if not self.__fired[changed_cell]:
+                score = scores[changed_cell] if prior is None else scores[changed_cell] * prior[changed_cell]
+                heapq.heappush(self.__heap, (-score, rng.random(), changed_cell))
+        if len(self.__heap) > 4 * size * size:
+            self.__rebuild_heap()
+
+    def __update_line(self, density: list, count: int, length: int, blocked: int, position: int, line_start: int,
+                      step: int, changed: set) -> None:
+        """
+        Remove the placements of one length through a cell along a row (step 1) or a column (step size).
+        Only the cells within length - 1 of the shot change, and their counts only depend on the cells within
+        2 * length - 2, so the memoized counts of that stretch are compared before and after the shot.
+        """
+        size = self.__board_size
+        low = max(0, position - 2 * length + 2)
+        high = min(size, position + 2 * length - 1)
+        stretch = blocked >> low & (1 << high - low) - 1
+        before = line_counts(high - low, stretch, length)
+        after = line_counts(high - low, stretch | 1 << position - low, length)
+        scores = self.__scores
+        for i in range(max(0, position - length + 1) - low, min(size, position + length) - low):
+            removed = before[i] - after[i]
+            if removed:
+                covered = line_start + (low + i) * step
+                density[covered] -= removed
+                scores[covered] -= count * removed
+                changed.add(covered)
+
+    def record_sunk(self, length: int) -> None:
+        """
+        Remove a sunk ship from the ships afloat
+        :param length: The length of the sunk ship
+        :type length: int
+        :return: None
+        """
+        if self.__ships_left[length] == 0:
+            return
+        self.__ships_left[length] -= 1
+        scores = self.__scores
+        for cell, value in enumerate(self.__density[length]):
+            scores[cell] -= value
+        if self.__ships_left[length] == 0:
+            del self.__ships_left[length]
+            del self.__density[length]
+        self.__rebuild_heap()
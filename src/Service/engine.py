@@ -0,0 +1,413 @@
+import random
+import struct
+from typing import NamedTuple, Optional
+
+from src.Service.computer_player import ComputerPlayer
+from src.Service.config import GameConfig, get_config
+from src.Service.move_log import MoveLog, open_move_log
+from src.Service.placement_habits import PlacementHabits
+from src.board.board import PlayerBoard, ComputerBoard
+from src.board.board_types import ShipDirection
+from src.board.serialization import encode_board, decode_board
+
+PLAYER = "Player"
+COMPUTER = "Computer"
+# The players as numbered in the move log
+_PLAYERS = (PLAYER, COMPUTER)
+
+# The phases of a game
+PLACING = "placing"
+PLAYING = "playing"
+OVER = "over"
+
+# The kinds of actions and events
+PLACE = "place"
+FIRE = "fire"
+PLACED = "placed"
+SHOT = "shot"
+GAME_OVER = "game_over"
+
+_DIRECTIONS = {
+    "h": ShipDirection.HORIZONTAL,
+    "horizontal": ShipDirection.HORIZONTAL,
+    "v": ShipDirection.VERTICAL,
+    "vertical": ShipDirection.VERTICAL,
+}
+
+# Bump GAME_FORMAT_VERSION whenever the layout changes and keep a decoder for every older version
+GAME_MAGIC = b"BSG"
+GAME_FORMAT_VERSION = 1
+_GAME_HEADER = struct.Struct("<3sBBIIIII")
+
+
+class Action(NamedTuple):
+    """
+    A move of the player, placing a ship on their board or firing at the computer's board.
+    Made of plain values only, so it can be sent and stored as JSON.
+    """
+    kind: str
+    x: int
+    y: int
+    direction: Optional[str] = None
+    length: Optional[int] = None
+
+    @classmethod
+    def place(cls, x: int, y: int, direction: str, length: int) -> "Action":
+        return cls(PLACE, x, y, direction, length)
+
+    @classmethod
+    def fire(cls, x: int, y: int) -> "Action":
+        return cls(FIRE, x, y)
+
+
+class Event(NamedTuple):
+    """
+    Something that happened in the game, for the drivers to show. Made of plain values only.
+    The player is the one who placed or fired, or the winner when the game is over.
+    """
+    kind: str
+    player: str
+    x: Optional[int] = None
+    y: Optional[int] = None
+    outcome: Optional[str] = None
+    ship: Optional[int] = None
+
+
+class SavedGame(NamedTuple):
+    """
+    A game decoded from the binary format of GameEngine.to_bytes.
+    """
+    player_hits: int
+    player_misses: int
+    computer_hits: int
+    computer_misses: int
+    battleships: int
+    ship_length: list
+    ships_to_place: list
+    player_board: PlayerBoard
+    computer_board: ComputerBoard
+
+
+def decode_game(data) -> SavedGame:
+    """
+    Decode a game encoded with GameEngine.to_bytes.
+
+    :param data: bytes - The encoded game.
+    :return: SavedGame - The counters, fleets and boards of the game.
+    :raises ValueError: If the data is not a saved game of a supported version.
+    """
+    data = memoryview(data)
+    magic, version, _, player_hits, player_misses, computer_hits, computer_misses, battleships = \
+        _GAME_HEADER.unpack_from(data, 0)
+    if magic != GAME_MAGIC:
+        raise ValueError("Not a saved game")
+    if version != GAME_FORMAT_VERSION:
+        raise ValueError(f"Unsupported game format version {version}")
+    offset = _GAME_HEADER.size
+    lengths = []
+    for _ in range(2):
+        count, = struct.unpack_from("<I", data, offset)
+        lengths.append(list(struct.unpack_from(f"<{count}I", data, offset + 4)))
+        offset += 4 + 4 * count
+    boards = []
+    for _ in range(2):
+        size, = struct.unpack_from("<I", data, offset)
+        boards.append(decode_board(data[offset + 4:offset + 4 + size])[0])
+        offset += 4 + size
+    return SavedGame(player_hits, player_misses, computer_hits, computer_misses, battleships, *lengths, *boards)
+
+
+def _fleet(lengths: list[int], battleships: int, board_size: int) -> list[int]:
+    """
+    Get the lengths of the battleships of each player, drawing from the configured lengths that fit on the board
+    when there are more or fewer of them than battleships.
+
+    :param lengths: list[int] - The configured lengths.
+    :param battleships: int - The number of battleships.
+    :param board_size: int - The size of the board.
+    :return: list[int] - The lengths of the battleships.
+    :raises ValueError: If none of the lengths fits on the board.
+    """
+    lengths = [length for length in lengths if length < board_size]
+    if not lengths:
+        raise ValueError("No ship fits on the board")
+    if len(lengths) < battleships:
+        return lengths + [random.choice(lengths) for _ in range(battleships - len(lengths))]
+    if len(lengths) > battleships:
+        return [random.choice(lengths) for _ in range(battleships)]
+    return lengths
+
+
+class GameEngine:
+    """
+    The rules and state of a game against the computer, driven one action at a time. Nothing blocks on input,
+    so a UI, a server or a test feeds the player's actions and shows the events they return, and one thread
+    can host any number of games.
+
+    The player first places their ships, then fires at the computer's board; every shot that does not end
+    the game is answered by the computer's shot within the same action.
+    """
+    def __init__(self, config: GameConfig = None, on_error=None):
+        """
+        Initialize the GameEngine class.
+
+        :param config: GameConfig - The settings, defaults to the settings file of this process.
+        :param on_error: callable - Called with the errors that do not stop the game, such as an unreadable profile.
+        """
+        self.config = config or get_config()
+        self.__on_error = on_error
+        self.player_board = PlayerBoard(self.config.board_size, self.config.storage)
+        self.computer_board = ComputerBoard(self.config.board_size, self.config.storage)
+        self.__battleships = self.config.battleships
+        self.__ship_length = _fleet(list(self.config.battle_ship_length), self.__battleships, self.config.board_size)
+        self.__player_battleships_length = self.__ship_length.copy()
+        self.player_hits = 0
+        self.player_misses = 0
+        self.computer_hits = 0
+        self.computer_misses = 0
+        self.__profile = self.config.player_profile
+        self.__habits = self.__load_habits()
+        # The computer's moves are drawn from a generator of their own, so they can be replayed from the seed
+        self.__seed = random.getrandbits(64)
+        self.__computer = self.__create_computer()
+        self.__finished = False
+        self.__log = open_move_log(self.config.move_log) if self.config.move_log else None
+        self.__game_id = random.getrandbits(64)
+        self.__logged = False
+
+    def __start_log(self) -> MoveLog or None:
+        """
+        Start the records of this game in the move log with its first record, so a game replaced by
+        load_bytes before any action leaves nothing in the log.
+
+        :return: MoveLog - The log, None if the game is not logged.
+        """
+        if self.__log is not None and not self.__logged:
+            self.__logged = True
+            self.__log.start(self.__game_id, self.player_board.get_size, self.config.ai_strategy,
+                             self.config.ai_move_time, self.__seed)
+        return self.__log
+
+    def __create_computer(self) -> ComputerPlayer:
+        return ComputerPlayer(self.computer_board, self.config.ai_strategy, self.config.ai_move_time,
+                              habits=self.__habits, rng=random.Random(self.__seed))
+
+    def __report(self, e: Exception):
+        if self.__on_error is not None:
+            self.__on_error(e)
+
+    def __load_habits(self) -> PlacementHabits or None:
+        """
+        Load the placement habits of the player's profile.
+
+        :return: PlacementHabits - The habits, None if no profile is set.
+        """
+        if not self.__profile:
+            return None
+        try:
+            return PlacementHabits.load(self.__profile, self.player_board.get_size)
+        except (OSError, ValueError) as e:
+            # An unreadable profile starts over and is replaced at the end of the game
+            self.__report(e)
+            return PlacementHabits(self.player_board.get_size)
+
+    def __save_habits(self):
+        """
+        Add where the player placed ships in this game to the profile.
+        """
+        if self.__habits is None:
+            return
+        try:
+            self.__habits.record(self.player_board.get_placements)
+            self.__habits.save(self.__profile)
+        except (OSError, ValueError) as e:
+            self.__report(e)
+
+    @property
+    def phase(self) -> str:
+        """
+        The phase of the game, PLACING until the player's fleet is placed, then PLAYING until a fleet is sunk, then OVER.
+        """
+        if self.__player_battleships_length:
+            return PLACING
+        if self.player_board.check_game_over() or self.computer_board.check_game_over():
+            return OVER
+        return PLAYING
+
+    @property
+    def winner(self) -> str or None:
+        """
+        The winner, PLAYER or COMPUTER, None while the game is not over.
+        """
+        if self.phase != OVER:
+            return None
+        return PLAYER if self.computer_board.check_game_over() else COMPUTER
+
+    @property
+    def ships_to_place(self) -> list[int]:
+        """
+        The lengths of the player's ships not placed yet.
+        """
+        return self.__player_battleships_length.copy()
+
+    def legal_actions(self):
+        """
+        Get every action the player can take now. Generated lazily, as a large board has millions of them.
+
+        :return: Iterator[Action] - The placements of the remaining ships or the cells not fired at yet.
+        """
+        phase = self.phase
+        if phase == PLACING:
+            return self.__legal_placements()
+        if phase == PLAYING:
+            size = self.computer_board.get_size
+            return (Action.fire(cell % size, cell // size) for cell in self.computer_board.get_legal_moves)
+        return iter(())
+
+    def __legal_placements(self):
+        size = self.player_board.get_size
+        for length in sorted(set(self.__player_battleships_length)):
+            for name, direction in (("horizontal", ShipDirection.HORIZONTAL), ("vertical", ShipDirection.VERTICAL)):
+                for y in range(size):
+                    for x in range(size):
+                        if self.player_board.is_legal_placement(length, x, y, direction):
+                            yield Action.place(x, y, name, length)
+
+    def apply(self, action: Action) -> list[Event]:
+        """
+        Take an action of the player and everything it sets off: the computer's fleet is placed with the
+        player's last ship and the computer answers every shot that does not end the game.
+
+        :param action: Action - The action.
+        :return: list[Event] - What happened, in order.
+        :raises ValueError: If the action is not legal now, the game is then unchanged.
+        """
+        phase = self.phase
+        if action.kind == PLACE:
+            if phase != PLACING:
+                raise ValueError("All ships are placed")
+            return self.__place(action)
+        if action.kind == FIRE:
+            if phase != PLAYING:
+                raise ValueError("Ships must be placed first" if phase == PLACING else "Game is over")
+            return self.__fire(action.x, action.y)
+        raise ValueError(f"Invalid action {action.kind}")
+
+    def __place(self, action: Action) -> list[Event]:
+        if action.length not in self.__player_battleships_length:
+            raise ValueError("Invalid ship length")
+        if str(action.direction).lower() not in _DIRECTIONS:
+            raise ValueError("Invalid direction")
+        direction = _DIRECTIONS[action.direction.lower()]
+        if len(self.__player_battleships_length) == 1 and \
+                self.player_board.is_legal_placement(action.length, action.x, action.y, direction):
+            # The computer's fleet goes first, a fleet that cannot be laid out leaves the player's last ship unplaced
+            self.place_computer_battleships()
+        ship = self.player_board.get_ship_count + 1
+        self.player_board.place_battleships(action.length, action.x, action.y, action.direction, ship)
+        self.__player_battleships_length.remove(action.length)
+        log = self.__start_log()
+        if log is not None:
+            log.place(self.__game_id, 0, ship, action.y * self.player_board.get_size + action.x,
+                             direction.value, action.length)
+        return [Event(PLACED, PLAYER, action.x, action.y, None, ship)]
+
+    def place_computer_battleships(self):
+        """
+        Place the computer's battleships on the board, unless they are already placed.
+        """
+        if not self.computer_board.get_ship_count:
+            self.__computer.place_battleships(self.__battleships, self.__ship_length.copy())
+            log = self.__start_log()
+            if log is not None:
+                size = self.computer_board.get_size
+                for ship, x, y, direction, length in self.computer_board.get_placements:
+                    log.place(self.__game_id, 1, ship, y * size + x, direction.value, length)
+
+    def __fire(self, x: int, y: int) -> list[Event]:
+        # Cells already fired at are rejected by the board's legal move index
+        log = self.__log
+        result = self.computer_board.check_hit(x, y)
+        if log is not None:
+            log.shot(self.__game_id, 0, y * self.computer_board.get_size + x, result.outcome.value)
+        events = [Event(SHOT, PLAYER, x, y, result.outcome.name.lower(), result.ship_number)]
+        if result.hit:
+            self.player_hits += 1
+        else:
+            self.player_misses += 1
+        if not result.game_over:
+            x, y, result = self.__computer.fire(self.player_board)
+            if log is not None:
+                log.shot(self.__game_id, 1, y * self.player_board.get_size + x, result.outcome.value)
+            events.append(Event(SHOT, COMPUTER, x, y, result.outcome.name.lower(), result.ship_number))
+            if result.hit:
+                self.computer_hits += 1
+            else:
+                self.computer_misses += 1
+        if result.game_over:
+            events.append(Event(GAME_OVER, self.winner))
+            if log is not None:
+                log.end(self.__game_id, _PLAYERS.index(self.winner))
+            self.__finish()
+        return events
+
+    def __finish(self):
+        """
+        Learn from the player's fleet and release the computer once the game is over.
+        """
+        if not self.__finished:
+            self.__finished = True
+            self.close()
+            self.__save_habits()
+
+    def close(self):
+        """
+        Release the resources of the computer, such as process pools. Also safe on a game left unfinished.
+        """
+        self.__computer.close()
+
+    def to_bytes(self) -> bytes:
+        """
+        Encode the state of the game in the compact binary format.
+
+        :return: bytes - The encoded game.
+        """
+        # It is always the player's turn between two actions
+        parts = [_GAME_HEADER.pack(GAME_MAGIC, GAME_FORMAT_VERSION, True, self.player_hits, self.player_misses,
+                                   self.computer_hits, self.computer_misses, self.__battleships)]
+        for lengths in (self.__ship_length, self.__player_battleships_length):
+            parts.append(struct.pack(f"<I{len(lengths)}I", len(lengths), *lengths))
+        for board in (self.player_board, self.computer_board):
+            record = encode_board(board, self.__ship_length)
+            parts.append(struct.pack("<I", len(record)))
+            parts.append(record)
+        return b"".join(parts)
+
+    def load_bytes(self, data):
+        """
+        Restore a game encoded with to_bytes, replacing the current boards.
+
+        :param data: bytes - The encoded game.
+        """
+        saved = decode_game(data)
+        self.close()
+        self.player_hits = saved.player_hits
+        self.player_misses = saved.player_misses
+        self.computer_hits = saved.computer_hits
+        self.computer_misses = saved.computer_misses
+        self.__battleships = saved.battleships
+        self.__ship_length = saved.ship_length
+        self.__player_battleships_length = saved.ships_to_place
+        self.player_board = saved.player_board
+        self.computer_board = saved.computer_board
+        self.__habits = self.__load_habits()
+        self.__seed = random.getrandbits(64)
+        self.__computer = self.__create_computer()
+        self.__computer.resume(self.player_board)
+        self.__finished = self.phase == OVER
+        # The loaded game continues in the move log as a new game starting from its whole state
+        self.__game_id = random.getrandbits(64)
+        self.__logged = False
+        log = self.__start_log()
+        if log is not None:
+            log.resume(self.__game_id, bytes(data))
@@ -1,8 +1,5 @@
-import random
-
-import pygame
-
-from src.Service.computer_player import ComputerPlayer
+from src.Service.config import GameConfig, get_config
+from src.Service.engine import Action, GameEngine, PLAYING, SHOT
 from src.board.board import PlayerBoard, ComputerBoard
 from src.ui.ui_interface import UiInterface
 
@@ -13,11 +10,7 @@ def get_board_size() -> int:
 
     :return: int - The board size.
     """
-    with open('settings.properties', 'r') as f:
-        for line in f:
-            if 'board_size' in line:
-                return int(line.split('=')[1].strip())
-        raise ValueError('Invalid board size setting')
+    return get_config().board_size
 
 def get_battleships() -> int:
     """
@@ -25,11 +18,7 @@ def get_battleships() -> int:
 
     :return: int - The number of battleships.
     """
-    with open('settings.properties', 'r') as f:
-        for line in f:
-            if 'battleships' in line:
-                return int(line.split('=')[1].strip())
-        raise ValueError('Invalid battleships setting')
+    return get_config().battleships
 
 def get_battle_ship_length() -> list[int]:
     """
@@ -37,91 +26,38 @@ def get_battle_ship_length() -> list[int]:
 
     :return: list[int] - The lengths of the battleships.
     """
-    with open('settings.properties', 'r') as f:
-        for line in f:
-            if 'battle_ship_length' in line:
-                return list(map(int, line.split('=')[1].strip().split(',')))
-        raise ValueError('Invalid battle ship length setting')
+    return list(get_config().battle_ship_length)
 
 
 class Game:
-    def __init__(self, ui: UiInterface):
+    """
+    Plays a game in a UI: asks the UI for the player's actions, applies them to a GameEngine and shows the
+    events. The UI may block for input, the engine never does.
+    """
+    def __init__(self, ui: UiInterface, config: GameConfig = None):
         """
         Initialize the Game class.
 
         :param ui: UiInterface - The UI interface.
+        :param config: GameConfig - The settings, defaults to the settings file of this process.
         """
         self.ui = ui
-        self.player_board = PlayerBoard(get_board_size())
-        self.computer_board = ComputerBoard(get_board_size())
-        self.__battleships = get_battleships()
-        self.__battleships_length = get_battle_ship_length()
-        self.__player_turn = True
-        self.__game_over = False
-        self.__winner = None
-        self.__player_hits = 0
-        self.computer_hits = 0
-        self.__player_misses = 0
-        self.computer_misses = 0
-        self.__player_battleships = self.__battleships
-        self.__ship_length = self.__get_battleship_length()
-        self.__player_battleships_length = self.__ship_length.copy()
-        self.__computer_battleships = self.__battleships
-        self.__computer_battleships_length = self.__ship_length.copy()
-        self.__computer = ComputerPlayer(self.computer_board)
-        self.__pygame = None
-
-    def __get_battleship_length(self) -> list[int]:
-        """
-        Get the lengths of the battleships.
-
-        :return: list[int] - The lengths of the battleships.
-        """
-        result = []
-
-        for length in self.__battleships_length:
-            if length >= get_board_size():
-                self.__battleships_length.remove(length)
-
-        if len(self.__battleships_length) < self.__battleships:
-            result = self.__generate_more_battleships()
-        if len(self.__battleships_length) > self.__battleships:
-            result = self.__select_battleships()
-        if len(self.__battleships_length) == self.__battleships:
-            return self.__battleships_length
-
-        return result
-
-    def __generate_more_battleships(self) -> list[int]:
-        """
-        Generate more battleships if needed.
-
-        :return: list[int] - The lengths of the battleships.
-        """
-        result = self.__battleships_length.copy()
-        remainder = self.__battleships - len(result)
+        self.config = config or get_config()
+        self.engine = GameEngine(self.config, on_error=ui.print_exception)
 
-        for _ in range(remainder):
-            result.append(random.choice(self.__battleships_length))
-
-        return result
-
-    def __select_battleships(self) -> list[int]:
-        """
-        Select battleships if there are too many.
+    @property
+    def player_board(self) -> PlayerBoard:
+        return self.engine.player_board
 
-        :return: list[int] - The lengths of the battleships.
-        """
-        result = []
-        for _ in range(self.__battleships):
-            result.append(random.choice(self.__battleships_length))
-        return result
+    @property
+    def computer_board(self) -> ComputerBoard:
+        return self.engine.computer_board
 
     def start(self):
         """
         Start the game.
         """
-        self.__pygame = self.ui.run(self)
+        self.ui.run(self)
         self.place_player_battleships()
         self.place_computer_battleships()
         self.__game_loop()
@@ -130,12 +66,10 @@ class Game:
         """
         Place the player's battleships on the board.
         """
-        for index in range(1, self.__player_battleships + 1):
+        # A loaded game may already have some of the ships placed
+        for index in range(self.player_board.get_ship_count + 1, self.config.battleships + 1):
             self.ui.print_board(self.player_board)
-            try:
-                self.place_player_ship(index)
-            except ValueError as e:
-                self.ui.print_exception(e)
+            self.place_player_ship(index)
 
         self.ui.print_board(self.player_board)
 
@@ -143,63 +77,83 @@ class Game:
         """
         Place a single player's battleship on the board.
 
-        :param index: int - The index of the battleship.
+        :param index: int - The index of the battleship, the engine numbers the ships in the order they are placed.
         """
-        try:
-            x, y, direction, length = self.ui.get_placement(self.__player_battleships_length)
-            if length not in self.__player_battleships_length:
-                raise ValueError("Invalid ship length")
-            self.player_board.place_battleships(length, x, y, direction, index)
-            self.__player_battleships_length.remove(length)
-        except ValueError as e:
-            self.ui.print_exception(e)
-            self.place_player_ship(index)
+        while True:
+            try:
+                x, y, direction, length = self.ui.get_placement(self.engine.ships_to_place)
+                self.engine.apply(Action.place(x, y, direction, length))
+                return
+            except ValueError as e:
+                self.ui.print_exception(e)
 
     def place_computer_battleships(self):
         """
         Place the computer's battleships on the board.
         """
-        self.__computer.place_battleships(self.__computer_battleships, self.__computer_battleships_length)
+        self.engine.place_computer_battleships()
 
     def __game_loop(self):
         """
         Run the main game loop.
         """
-        while not self.__game_over:
-            if self.__player_turn:
-                self.player_play()
-            else:
-                self.__computer_play()
+        while self.engine.phase == PLAYING:
+            self.player_play()
             self.ui.print_boards(self.player_board, self.computer_board)
-            self.__player_turn = not self.__player_turn
-            self.__game_over = self.player_board.check_game_over() or self.computer_board.check_game_over()
-        self.__winner = "Player" if self.computer_board.check_game_over() else "Computer"
-        self.ui.print_game_over(self.__winner, self.__player_hits, self.__player_misses, self.computer_hits, self.computer_misses)
+        engine = self.engine
+        self.ui.print_game_over(engine.winner, engine.player_hits, engine.player_misses, engine.computer_hits,
+                                engine.computer_misses)
         self.ui.print_boards(self.player_board, self.computer_board)
-        if self.__pygame:
-            pygame.quit()
+        self.ui.close()
 
     def player_play(self):
         """
-        Handle the player's turn.
-        """
-        try:
-            x, y = self.ui.get_play_coordinates()
-            hit, boat = self.computer_board.check_hit(x, y)
-            self.ui.print_result(hit, "Player")
-            if hit:
-                self.__player_hits += 1
-                if self.computer_board.check_ship_sunk(boat):
-                    self.ui.print_sunk("Player")
-            else:
-                self.__player_misses += 1
-        except ValueError as e:
-            self.ui.print_exception(e)
-            self.ui.print_boards(self.player_board, self.computer_board)
-            self.player_play()
+        Handle the player's turn and the computer's answer.
+        """
+        while True:
+            try:
+                x, y = self.ui.get_play_coordinates()
+                events = self.engine.apply(Action.fire(x, y))
+                break
+            except ValueError as e:
+                self.ui.print_exception(e)
+                self.ui.print_boards(self.player_board, self.computer_board)
+        for event in events:
+            if event.kind == SHOT:
+                self.ui.print_result(event.outcome != "miss", event.player)
+                if event.outcome == "sunk":
+                    self.ui.print_sunk(event.player)
+
+    def to_bytes(self) -> bytes:
+        """
+        Encode the state of the game in the compact binary format.
 
-    def __computer_play(self):
+        :return: bytes - The encoded game.
         """
-        Handle the computer's turn.
+        return self.engine.to_bytes()
+
+    def load_bytes(self, data):
+        """
+        Restore a game encoded with to_bytes, replacing the current boards.
+
+        :param data: bytes - The encoded game.
+        """
+        self.engine.load_bytes(data)
+
+    def save(self, path: str):
+        """
+        Save the game in progress to a file.
+
+        :param path: str - The path of the file.
+        """
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    def load(self, path: str):
+        """
+        Load a game saved with save.
+
+        :param path: str - The path of the file.
         """
-        self.__computer.play(self.player_board, self)
\ No newline at end of file
+        with open(path, "rb") as f:
+            self.load_bytes(f.read())
@@ -0,0 +1,140 @@
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from src.board.board_types import ShipDirection
+from src.board.placement import PlacementEngine
+
+
+def sample_layouts(board_size: int, lengths: list, blocked: list, required: list, samples: int,
+                   time_limit: float, seed: int) -> tuple:
+    """
+    Sample fleet layouts consistent with what is known about a board and count how often each cell is covered.
+    Runs in the worker processes, so it only takes and returns plain data.
+    :param board_size: The size of the board
+    :type board_size: int
+    :param lengths: The lengths of the ships still afloat
+    :type lengths: list
+    :param blocked: Cells (x, y) no ship afloat can cover: misses and the cells of sunk ships
+    :type blocked: list
+    :param required: Cells (x, y) hit on ships that are still afloat, every layout must cover them
+    :type required: list
+    :param samples: The number of layouts to draw
+    :type samples: int
+    :param time_limit: Seconds after which sampling stops early, at least 16 layouts are always drawn
+    :type time_limit: float
+    :param seed: The seed of the random generator
+    :type seed: int
+    :return: The cover count of every untried cell as a Counter of y * size + x, and the number of accepted layouts
+    :rtype: tuple
+    """
+    deadline = time.perf_counter() + time_limit
+    rng = random.Random(seed)
+    engine = PlacementEngine(board_size, blocked)
+    required = {y * board_size + x for x, y in required}
+    counts = Counter()
+    accepted = 0
+    for sample in range(samples):
+        if sample and sample % 16 == 0 and time.perf_counter() > deadline:
+            break
+        try:
+            layout = engine.layout(lengths, rng, max_restarts=0)
+        except ValueError:
+            continue
+        cells = set()
+        for x, y, direction, length in layout:
+            step = 1 if direction == ShipDirection.HORIZONTAL else board_size
+            start = y * board_size + x
+            cells.update(range(start, start + length * step, step))
+        if not required <= cells:
+            continue
+        accepted += 1
+        counts.update(cells - required)
+    return counts, accepted
+
+
+class MonteCarloTargeting:
+    """
+    Estimates the hit probability of every cell from random fleet layouts consistent with the hits, misses and
+    sunk ships seen so far. Sampling is spread over a process pool, move quality grows with the sample budget.
+    """
+    def __init__(self, board_size: int, samples: int = 2000, time_limit: float = 0.5, workers: int = 1,
+                 rng: random.Random = random, prior: list = None):
+        """
+        :param board_size: The size of the board being attacked
+        :type board_size: int
+        :param samples: The number of layouts to sample per move
+        :type samples: int
+        :param time_limit: Seconds a move may spend sampling
+        :type time_limit: float
+        :param workers: The number of processes to sample in, 1 samples in the calling process
+        :type workers: int
+        :param rng: The random generator the worker seeds are drawn from
+        :type rng: random.Random
+        :param prior: A multiplier per cell y * size + x of the cover counts, None for no prior
+        :type prior: list
+        """
+        self.__board_size = board_size
+        self.__prior = prior
+        self.__samples = samples
+        self.__time_limit = time_limit
+        self.__workers = max(1, workers)
+        self.__rng = rng
+        self.__pool = None
+
+    def best(self, lengths: list, blocked: list, required: list, time_limit: float = None) -> tuple or None:
+        """
+        Get the untried cell covered by the most sampled layouts
+        :param lengths: The lengths of the ships still afloat
+        :type lengths: list
+        :param blocked: Misses and cells of sunk ships
+        :type blocked: list
+        :param required: Hit cells of ships still afloat
+        :type required: list
+        :param time_limit: Seconds this move may spend sampling, defaults to the configured limit
+        :type time_limit: float
+        :return: The x and y coordinates, None if no consistent layout was found
+        :rtype: tuple
+        """
+        time_limit = self.__time_limit if time_limit is None else time_limit
+        deadline = time.perf_counter() + time_limit
+        counts, accepted = self.__sample(lengths, blocked, required, time_limit)
+        if not accepted and required:
+            # The hits are too constraining for rejection sampling, fall back to the misses and sunk ships only,
+            # within what is left of the move's time
+            counts, accepted = self.__sample(lengths, blocked + required, [],
+                                             max(0.0, deadline - time.perf_counter()))
+        if not counts:
+            return None
+        if self.__prior is None:
+            cell = max(counts, key=counts.get)
+        else:
+            cell = max(counts, key=lambda cell: counts[cell] * self.__prior[cell])
+        return cell % self.__board_size, cell // self.__board_size
+
+    def __sample(self, lengths: list, blocked: list, required: list, time_limit: float) -> tuple:
+        if self.__workers == 1:
+            return sample_layouts(self.__board_size, lengths, blocked, required, self.__samples, time_limit,
+                                  self.__rng.getrandbits(32))
+        if self.__pool is None:
+            self.__pool = ProcessPoolExecutor(max_workers=self.__workers)
+        share, extra = divmod(self.__samples, self.__workers)
+        futures = [self.__pool.submit(sample_layouts, self.__board_size, lengths, blocked, required,
+                                      share + (worker < extra), time_limit, self.__rng.getrandbits(32))
+                   for worker in range(self.__workers)]
+        counts = Counter()
+        accepted = 0
+        for future in futures:
+            worker_counts, worker_accepted = future.result()
+            counts.update(worker_counts)
+            accepted += worker_accepted
+        return counts, accepted
+
+    def close(self) -> None:
+        """
+        Shut down the process pool
+        """
+        if self.__pool is not None:
+            self.__pool.shutdown()
+            self.__pool = None
@@ -0,0 +1,191 @@
+import atexit
+import os
+import struct
+import threading
+from functools import lru_cache
+
+from src.board.serialization import RecordReader
+
+# Bump LOG_FORMAT_VERSION whenever a record layout changes, it is stored in the START record of every game
+LOG_FORMAT_VERSION = 2
+
+# The kinds of records
+START = 1
+PLACE = 2
+SHOT = 3
+END = 4
+RESUME = 5
+
+
+def _layout(fields: str) -> tuple:
+    # The layout of a record, and of the record with the length prefix of RecordWriter, as it is written
+    return struct.Struct("<" + fields), struct.Struct("<I" + fields)
+
+
+# Every record starts with its kind and its game
+_HEADER = struct.Struct("<BQ")
+_START_RECORD, _START = _layout("BQBIdQB")
+_PLACE_RECORD, _PLACE = _layout("BQBIIBI")
+_SHOT_RECORD, _SHOT = _layout("BQBIB")
+_END_RECORD, _END = _layout("BQB")
+_RESUME_RECORD, _RESUME = _layout("BQ")
+
+
+class MoveLog:
+    """
+    Appends the placements and shots of games to a file of length-prefixed records, readable with RecordReader.
+    Records are gathered in memory and written buffer_size bytes at a time, whole records only, with one
+    append each, so the games of several threads or processes can share a log. A game's records are written
+    out at the latest when it ends.
+    """
+    def __init__(self, path: str, buffer_size: int = 1 << 16):
+        """
+        :param path: The path of the log, created if missing
+        :type path: str
+        :param buffer_size: The number of bytes gathered before they are written
+        :type buffer_size: int
+        """
+        self.__fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.__buffer_size = buffer_size
+        self.__buffer = bytearray()
+        self.__lock = threading.Lock()
+
+    def start(self, game: int, board_size: int, strategy: str, move_time: float, seed: int) -> None:
+        """
+        Log the start of a game
+        :param game: The game
+        :type game: int
+        :param board_size: The size of the boards
+        :type board_size: int
+        :param strategy: The strategy of the computer
+        :type strategy: str
+        :param move_time: Seconds a move of the computer may take
+        :type move_time: float
+        :param seed: The seed of the random generator of the computer's moves
+        :type seed: int
+        """
+        name = strategy.encode()
+        self.__append(_START.pack(_START_RECORD.size + len(name), START, game, LOG_FORMAT_VERSION, board_size,
+                                  move_time, seed, len(name)) + name)
+
+    def resume(self, game: int, data: bytes) -> None:
+        """
+        Log the whole state of a game that was loaded, the records of the game continue from it
+        :param game: The game
+        :type game: int
+        :param data: The game encoded with GameEngine.to_bytes
+        :type data: bytes
+        """
+        self.__append(_RESUME.pack(_RESUME_RECORD.size + len(data), RESUME, game) + data)
+
+    def place(self, game: int, player: int, ship: int, cell: int, direction: int, length: int) -> None:
+        self.__append(_PLACE.pack(_PLACE_RECORD.size, PLACE, game, player, ship, cell, direction, length))
+
+    def shot(self, game: int, player: int, cell: int, outcome: int) -> None:
+        self.__append(_SHOT.pack(_SHOT_RECORD.size, SHOT, game, player, cell, outcome))
+
+    def end(self, game: int, winner: int) -> None:
+        self.__append(_END.pack(_END_RECORD.size, END, game, winner))
+        self.flush()
+
+    def __append(self, record: bytes) -> None:
+        with self.__lock:
+            self.__buffer += record
+            if len(self.__buffer) >= self.__buffer_size:
+                self.__write()
+
+    def __write(self) -> None:
+        written = 0
+        with memoryview(self.__buffer) as data:
+            while written < len(data):
+                written += os.write(self.__fd, data[written:])
+        self.__buffer.clear()
+
+    def flush(self) -> None:
+        with self.__lock:
+            self.__write()
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__fd is not None:
+                self.__write()
+                os.close(self.__fd)
+                self.__fd = None
+
+
+@lru_cache(maxsize=None)
+def open_move_log(path: str) -> MoveLog:
+    """
+    Get the log of this process at a path, opened on the first call and closed when the process exits
+    :param path: The path of the log
+    :type path: str
+    :return: The log
+    :rtype: MoveLog
+    """
+    log = MoveLog(path)
+    atexit.register(log.close)
+    return log
+
+
+class GameLog:
+    """
+    The records of one game read back from a log. placements holds (player, ship, cell, direction, length)
+    and shots (player, cell, outcome) tuples, in the order they happened, where player is 0 for the player
+    and 1 for the computer, direction a ShipDirection value and outcome a ShotOutcome value.
+    """
+    def __init__(self, game: int, board_size: int, strategy: str, move_time: float, seed: int):
+        self.game = game
+        self.board_size = board_size
+        self.strategy = strategy
+        self.move_time = move_time
+        self.seed = seed
+        self.snapshot = None
+        self.placements = []
+        self.shots = []
+        self.winner = None
+
+
+def read_games(path: str) -> dict:
+    """
+    Read the games of a log. A record cut short at the end of the file, by a crash while it was
+    written, is left out.
+    :param path: The path of the log
+    :type path: str
+    :return: The games by their id, in the order they started
+    :rtype: dict
+    :raises ValueError: If the log is invalid or of an unsupported version
+    """
+    games = {}
+    with RecordReader(path) as reader:
+        for record in reader:
+            # Released at once, as the mapping of the file cannot be closed while a record points into it
+            with record:
+                _read_record(games, record)
+    return games
+
+
+def _read_record(games: dict, record: memoryview) -> None:
+    try:
+        kind, game = _HEADER.unpack_from(record)
+        if kind == START:
+            # The version first, as the layout of the rest depends on it
+            version = record[_HEADER.size]
+            if version != LOG_FORMAT_VERSION:
+                raise ValueError(f"Unsupported move log format version {version}")
+            board_size, move_time, seed, length = _START_RECORD.unpack_from(record)[3:]
+            name = bytes(record[_START_RECORD.size:_START_RECORD.size + length])
+            games[game] = GameLog(game, board_size, name.decode(), move_time, seed)
+            return
+        log = games[game]
+        if kind == PLACE:
+            log.placements.append(_PLACE_RECORD.unpack_from(record)[2:])
+        elif kind == SHOT:
+            log.shots.append(_SHOT_RECORD.unpack_from(record)[2:])
+        elif kind == END:
+            log.winner = _END_RECORD.unpack_from(record)[2]
+        elif kind == RESUME:
+            log.snapshot = bytes(record[_RESUME_RECORD.size:])
+        else:
+            raise ValueError("Invalid move log")
+    except (struct.error, IndexError, KeyError, UnicodeDecodeError):
+        raise ValueError("Invalid move log") from None
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import struct
+import tempfile
+
+from src.Service.strategies import STRATEGIES
+
+# Bump BOOK_FORMAT_VERSION whenever the file layout or the way openings are computed changes
+BOOK_MAGIC = b"BSO"
+BOOK_FORMAT_VERSION = 1
+OPENING_LENGTH = 32
+
+_BOOK_HEADER = struct.Struct("<3sBI")
+
+
+def default_cache_directory() -> str:
+    """
+    Get the directory of the opening book, $BATTLESHIPS_CACHE_DIR or ~/.cache/battleships/openings
+    :return: The path of the directory
+    :rtype: str
+    """
+    root = os.environ.get("BATTLESHIPS_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "battleships")
+    return os.path.join(root, "openings")
+
+
+class OpeningBook:
+    """
+    Openings of the strategies, computed once per (strategy, board size, fleet) and kept on disk.
+    Every use of an opening refreshes the modification time of its file, and the least recently used
+    files are deleted once there are more than max_entries of them.
+    """
+    def __init__(self, directory: str = None, max_entries: int = 64, length: int = OPENING_LENGTH):
+        """
+        :param directory: The directory of the book files, defaults to default_cache_directory()
+        :type directory: str
+        :param max_entries: The number of openings kept on disk
+        :type max_entries: int
+        :param length: The number of moves of an opening
+        :type length: int
+        """
+        self.__directory = directory or default_cache_directory()
+        self.__max_entries = max_entries
+        self.__length = length
+        self.__loaded = {}
+
+    def __path(self, strategy: str, board_size: int, fleet: list) -> str:
+        lengths = ",".join(map(str, sorted(fleet)))
+        digest = hashlib.sha1(f"{self.__length}:{lengths}".encode()).hexdigest()[:16]
+        return os.path.join(self.__directory, f"{strategy}-{board_size}-{digest}.book")
+
+    def get(self, strategy: str, board_size: int, fleet: list) -> list or None:
+        """
+        Get the opening of a strategy, from memory, from disk or computed and saved
+        :param strategy: The name of the strategy
+        :type strategy: str
+        :param board_size: The size of the board being attacked
+        :type board_size: int
+        :param fleet: The lengths of the ships on the board being attacked
+        :type fleet: list
+        :return: The cells y * size + x of the opening moves, None if the strategy has no fixed opening or
+            the fleet is empty
+        :rtype: list
+        """
+        if not fleet:
+            return None
+        path = self.__path(strategy, board_size, fleet)
+        if path in self.__loaded:
+            self.__touch(path)
+            return self.__loaded[path]
+        moves = self.__read(path)
+        if moves is None:
+            moves = STRATEGIES[strategy].opening(board_size, list(fleet), self.__length)
+            if moves is not None:
+                self.__write(path, moves)
+        self.__loaded[path] = moves
+        return moves
+
+    @staticmethod
+    def __touch(path: str) -> None:
+        # Keeps the books in use from being evicted by other processes sharing the directory
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def __read(path: str) -> list or None:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        if len(data) < _BOOK_HEADER.size:
+            return None
+        magic, version, count = _BOOK_HEADER.unpack_from(data)
+        if magic != BOOK_MAGIC or version != BOOK_FORMAT_VERSION or len(data) != _BOOK_HEADER.size + 4 * count:
+            return None
+        return list(struct.unpack_from(f"<{count}I", data, _BOOK_HEADER.size))
+
+    def __write(self, path: str, moves: list) -> None:
+        # A book that cannot be written is only recomputed next time
+        temporary = None
+        try:
+            os.makedirs(self.__directory, exist_ok=True)
+            # A file of its own, as the threads of a server and the self-play workers share the book
+            with tempfile.NamedTemporaryFile(dir=self.__directory, suffix=".tmp", delete=False) as f:
+                temporary = f.name
+                f.write(_BOOK_HEADER.pack(BOOK_MAGIC, BOOK_FORMAT_VERSION, len(moves)))
+                f.write(struct.pack(f"<{len(moves)}I", *moves))
+            # Replaced atomically, so a book is never read half written
+            os.replace(temporary, path)
+            self.__evict()
+        except OSError:
+            if temporary is not None:
+                try:
+                    os.remove(temporary)
+                except OSError:
+                    pass
+
+    def __evict(self) -> None:
+        """
+        Delete the least recently used books over max_entries
+        """
+        books = []
+        for entry in os.scandir(self.__directory):
+            if entry.name.endswith(".book"):
+                try:
+                    books.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass
+        books.sort()
+        for _, path in books[:max(0, len(books) - self.__max_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
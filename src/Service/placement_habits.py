@@ -0,0 +1,164 @@
+import os
+import re
+import struct
+import sys
+import tempfile
+from array import array
+
+from src.board.board_types import ShipDirection
+
+# Bump HABITS_FORMAT_VERSION whenever the file layout changes
+HABITS_MAGIC = b"BSH"
+HABITS_FORMAT_VERSION = 1
+# Games of uniformly random placements the habits start from, so a few games only nudge the weights
+PRIOR_GAMES = 5
+
+_HABITS_HEADER = struct.Struct("<3sBII")
+_MAX_COUNT = 0xFFFF
+_PROFILE_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def default_profile_directory() -> str:
+    """
+    Get the directory of the player profiles, $BATTLESHIPS_DATA_DIR/profiles or ~/.local/share/battleships/profiles
+    :return: The path of the directory
+    :rtype: str
+    """
+    root = os.environ.get("BATTLESHIPS_DATA_DIR") or os.path.join(os.path.expanduser("~"), ".local", "share",
+                                                                   "battleships")
+    return os.path.join(root, "profiles")
+
+
+class PlacementHabits:
+    """
+    How often the ships of a player covered every cell of the board, over the past games of a profile.
+    Stored as one 16-bit counter per cell; all counters are halved when one would overflow, which also
+    lets recent games weigh more.
+    """
+    def __init__(self, board_size: int, counts: array = None, games: int = 0):
+        """
+        :param board_size: The size of the board
+        :type board_size: int
+        :param counts: The number of games each cell y * size + x was covered in
+        :type counts: array
+        :param games: The number of games recorded
+        :type games: int
+        """
+        self.__board_size = board_size
+        self.__counts = counts if counts is not None else array("H", bytes(2 * board_size * board_size))
+        self.__games = games
+
+    @property
+    def games(self) -> int:
+        return self.__games
+
+    @staticmethod
+    def path(profile: str, board_size: int, directory: str = None) -> str:
+        """
+        Get the file of a profile for a board size
+        :param profile: The name of the profile, letters, digits, "_" and "-"
+        :type profile: str
+        :param board_size: The size of the board
+        :type board_size: int
+        :param directory: The directory of the profiles, defaults to default_profile_directory()
+        :type directory: str
+        :return: The path of the file
+        :rtype: str
+        """
+        if not _PROFILE_NAME.match(profile):
+            raise ValueError(f"Invalid profile name: {profile}")
+        return os.path.join(directory or default_profile_directory(), f"{profile}-{board_size}.habits")
+
+    @classmethod
+    def load(cls, profile: str, board_size: int, directory: str = None) -> "PlacementHabits":
+        """
+        Load the habits of a profile, empty if it has no games on this board size yet
+        :param profile: The name of the profile
+        :type profile: str
+        :param board_size: The size of the board
+        :type board_size: int
+        :param directory: The directory of the profiles, defaults to default_profile_directory()
+        :type directory: str
+        :return: The habits
+        :rtype: PlacementHabits
+        """
+        try:
+            with open(cls.path(profile, board_size, directory), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return cls(board_size)
+        cells = board_size * board_size
+        if len(data) != _HABITS_HEADER.size + 2 * cells:
+            raise ValueError("Invalid habits file")
+        magic, version, size, games = _HABITS_HEADER.unpack_from(data)
+        if magic != HABITS_MAGIC or size != board_size:
+            raise ValueError("Invalid habits file")
+        if version != HABITS_FORMAT_VERSION:
+            raise ValueError(f"Unsupported habits format version {version}")
+        counts = array("H")
+        counts.frombytes(data[_HABITS_HEADER.size:])
+        if sys.byteorder == "big":
+            counts.byteswap()
+        return cls(board_size, counts, games)
+
+    def save(self, profile: str, directory: str = None) -> None:
+        """
+        Save the habits of a profile
+        :param profile: The name of the profile
+        :type profile: str
+        :param directory: The directory of the profiles, defaults to default_profile_directory()
+        :type directory: str
+        :return: None
+        """
+        path = self.path(profile, self.__board_size, directory)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        counts = self.__counts
+        if sys.byteorder == "big":
+            counts = array("H", counts)
+            counts.byteswap()
+        temporary = None
+        try:
+            # A file of its own, as games of one profile may be saved by several threads at once
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".tmp", delete=False) as f:
+                temporary = f.name
+                f.write(_HABITS_HEADER.pack(HABITS_MAGIC, HABITS_FORMAT_VERSION, self.__board_size, self.__games))
+                f.write(counts.tobytes())
+            os.replace(temporary, path)
+        except OSError:
+            if temporary is not None and os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def record(self, placements: list) -> None:
+        """
+        Add the ships of a finished game
+        :param placements: The (ship number, x, y, direction, length) of every ship, as Board.get_placements
+        :type placements: list
+        :return: None
+        """
+        counts = self.__counts
+        if max(counts, default=0) == _MAX_COUNT:
+            self.__counts = counts = array("H", (count >> 1 for count in counts))
+            self.__games >>= 1
+        size = self.__board_size
+        for _, x, y, direction, length in placements:
+            step = 1 if direction == ShipDirection.HORIZONTAL else size
+            start = y * size + x
+            for cell in range(start, start + length * step, step):
+                counts[cell] += 1
+        self.__games += 1
+
+    def prior(self) -> list or None:
+        """
+        Get how much more likely than average each cell is to hold a ship, from the recorded games
+        smoothed towards PRIOR_GAMES games of uniform placements
+        :return: The multiplier of every cell y * size + x, None if no game was recorded
+        :rtype: list
+        """
+        counts = self.__counts
+        mean = sum(counts) / len(counts)
+        if not self.__games or not mean:
+            return None
+        uniform = PRIOR_GAMES * mean / self.__games
+        scale = 1 / (mean + uniform)
+        return [(count + uniform) * scale for count in counts]
@@ -0,0 +1,165 @@
+import argparse
+import random
+import sys
+import time
+from typing import NamedTuple, Optional
+
+from src.Service.computer_player import ComputerPlayer
+from src.Service.engine import COMPUTER, PLAYER, decode_game
+from src.Service.move_log import GameLog, read_games
+from src.board.board import Board, ComputerBoard, PlayerBoard
+from src.board.board_types import ShipDirection, ShotOutcome
+
+_PLAYERS = (PLAYER, COMPUTER)
+
+
+class ReplayResult(NamedTuple):
+    """
+    A game rebuilt from its records. The shots count those made before a resumed game was loaded.
+    """
+    game: int
+    player_board: PlayerBoard
+    computer_board: ComputerBoard
+    player_shots: int
+    computer_shots: int
+    winner: Optional[str]
+    seed: int
+
+
+def _place(board: Board, ship: int, cell: int, direction: int, length: int) -> None:
+    size = board.get_size
+    direction = ShipDirection(direction)
+    # PlayerBoard takes the direction by name, as typed by the player
+    board.place_battleships(length, cell % size, cell // size,
+                            direction.name if isinstance(board, PlayerBoard) else direction, ship)
+
+
+def reconstruct(log: GameLog, storage: str = "bitboard") -> ReplayResult:
+    """
+    Rebuild a game from its records, checking that every shot has the outcome it was logged with
+    :param log: The records of the game
+    :type log: GameLog
+    :param storage: The storage engine of the boards
+    :type storage: str
+    :return: The boards and counts of the game
+    :rtype: ReplayResult
+    :raises ValueError: If the records contradict each other
+    """
+    if log.snapshot is not None:
+        saved = decode_game(log.snapshot)
+        boards = saved.player_board, saved.computer_board
+        shots = [saved.player_hits + saved.player_misses, saved.computer_hits + saved.computer_misses]
+    else:
+        boards = PlayerBoard(log.board_size, storage), ComputerBoard(log.board_size, storage)
+        shots = [0, 0]
+    for player, ship, cell, direction, length in log.placements:
+        _place(boards[player], ship, cell, direction, length)
+    size = log.board_size
+    for index, (player, cell, outcome) in enumerate(log.shots):
+        # Each player fires at the board of the other
+        result = boards[1 - player].check_hit(cell % size, cell // size)
+        if result.outcome.value != outcome:
+            raise ValueError(f"Game {log.game:016x}: shot {index} of the {_PLAYERS[player].lower()} was logged as "
+                             f"{ShotOutcome(outcome).name.lower()} but replays as {result.outcome.name.lower()}")
+        shots[player] += 1
+    winner = None
+    if boards[1].check_game_over() and boards[1].get_ship_count:
+        winner = PLAYER
+    elif boards[0].check_game_over() and boards[0].get_ship_count:
+        winner = COMPUTER
+    if log.winner is not None and _PLAYERS[log.winner] != winner:
+        raise ValueError(f"Game {log.game:016x}: logged as won by the {_PLAYERS[log.winner].lower()} "
+                         f"but replays as won by {(winner or 'nobody').lower()}")
+    return ReplayResult(log.game, boards[0], boards[1], shots[0], shots[1], winner, log.seed)
+
+
+def rerun(result: ReplayResult, strategy: str, move_time: float = None, storage: str = "bitboard",
+          seed: int = None) -> int:
+    """
+    Let the computer attack the player's fleet of a game again, without a UI, until it is sunk. With the
+    logged strategy and seed, and a move time that never cuts a move short, the computer makes the moves
+    of the logged game again, unless that game was resumed or learned from a player profile.
+    :param result: The rebuilt game
+    :type result: ReplayResult
+    :param strategy: The strategy of the computer
+    :type strategy: str
+    :param move_time: Seconds a move may take, None for no limit
+    :type move_time: float
+    :param storage: The storage engine of the boards
+    :type storage: str
+    :param seed: The seed of the computer's moves, None for the logged one
+    :type seed: int
+    :return: The number of shots the computer needed
+    :rtype: int
+    """
+    size = result.player_board.get_size
+    target = PlayerBoard(size, storage)
+    for ship, x, y, direction, length in result.player_board.get_placements:
+        _place(target, ship, y * size + x, direction.value, length)
+    # The strategies read the fleet they hunt from the computer's own board, as both fleets are the same ships
+    board = ComputerBoard(size, storage)
+    for ship, x, y, direction, length in result.computer_board.get_placements:
+        _place(board, ship, y * size + x, direction.value, length)
+    computer = ComputerPlayer(board, strategy, move_time, rng=random.Random(result.seed if seed is None else seed))
+    shots = 0
+    try:
+        while not target.check_game_over():
+            computer.fire(target)
+            shots += 1
+    finally:
+        computer.close()
+    return shots
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild the games of a move log and regenerate their statistics")
+    parser.add_argument("log", help="The move log, as written with the move_log setting")
+    parser.add_argument("--game", help="Only this game, by its hexadecimal id, and show its boards")
+    parser.add_argument("--rerun", action="store_true", help="Let the computer attack every finished game again")
+    parser.add_argument("--strategy", help="The strategy of the rerun, the logged one by default")
+    parser.add_argument("--move-time", type=float, default=None, help="Seconds a rerun move may take")
+    parser.add_argument("--seed", type=int, default=None, help="The seed of every rerun, the logged ones by default")
+    args = parser.parse_args(argv)
+
+    logs = list(read_games(args.log).values())
+    if args.game is not None:
+        logs = [log for log in logs if log.game == int(args.game, 16)]
+        if not logs:
+            print(f"No game {args.game} in the log", file=sys.stderr)
+            return 1
+
+    start = time.perf_counter()
+    results = []
+    errors = 0
+    for log in logs:
+        try:
+            results.append((log, reconstruct(log)))
+        except ValueError as e:
+            print(e)
+            errors += 1
+    seconds = time.perf_counter() - start
+    shots = sum(len(log.shots) for log in logs)
+    finished = [(log, result) for log, result in results if result.winner is not None]
+    print(f"{len(logs)} games, {len(finished)} finished, {errors} inconsistent: {shots} shots replayed in "
+          f"{seconds:.3f}s ({shots / seconds if seconds else 0:.0f} shots/s)")
+    if finished:
+        wins = sum(result.winner == PLAYER for _, result in finished)
+        logged = sum(result.computer_shots for _, result in finished) / len(finished)
+        print(f"Wins: player {wins}, computer {len(finished) - wins}")
+        print(f"Computer shots per finished game: {logged:.2f}")
+        if args.rerun:
+            start = time.perf_counter()
+            reruns = [rerun(result, args.strategy or log.strategy,
+                            args.move_time if args.move_time is not None else log.move_time, seed=args.seed)
+                      for log, result in finished]
+            mean = sum(reruns) / len(reruns)
+            print(f"Rerun to sink the player's fleet: {mean:.2f} shots per game in "
+                  f"{time.perf_counter() - start:.2f}s")
+    if args.game is not None and results:
+        _, result = results[0]
+        print(f"Player board:\n{result.player_board}\nComputer board:\n{result.computer_board}")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
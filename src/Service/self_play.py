@@ -0,0 +1,193 @@
+import argparse
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from src.Service.computer_player import ComputerPlayer
+from src.Service.strategies import STRATEGIES
+from src.board.board import ComputerBoard
+
+
+class SelfPlayReport(NamedTuple):
+    """
+    The outcome of a self-play run. histogram maps the number of shots the winner fired to the number of games.
+    """
+    games: int
+    seconds: float
+    wins: tuple
+    histogram: Counter
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else float("inf")
+
+    @property
+    def mean_shots(self) -> float:
+        return sum(shots * count for shots, count in self.histogram.items()) / self.games if self.games else 0.0
+
+
+def play_game(board_size: int, fleet: list, strategies: tuple, first: int = 0, move_time: float = None,
+              storage: str = "bitboard") -> tuple:
+    """
+    Play one game between two computer players, without any UI
+    :param board_size: The size of both boards
+    :type board_size: int
+    :param fleet: The lengths of the ships of both fleets
+    :type fleet: list
+    :param strategies: The strategy names of the two players
+    :type strategies: tuple
+    :param first: The index of the player who fires first
+    :type first: int
+    :param move_time: Seconds a move may take, None for no limit
+    :type move_time: float
+    :param storage: The storage engine of the boards
+    :type storage: str
+    :return: The index of the winner and the number of shots the winner fired
+    :rtype: tuple
+    """
+    boards = [ComputerBoard(board_size, storage) for _ in strategies]
+    players = [ComputerPlayer(board, strategy, move_time) for board, strategy in zip(boards, strategies)]
+    try:
+        for player in players:
+            player.place_battleships(len(fleet), fleet)
+        shots = [0, 0]
+        turn = first
+        while True:
+            target = boards[1 - turn]
+            players[turn].fire(target)
+            shots[turn] += 1
+            if target.check_game_over():
+                return turn, shots[turn]
+            turn = 1 - turn
+    finally:
+        for player in players:
+            player.close()
+
+
+def play_games(board_size: int, fleet: list, strategies: tuple, games: int, seed: int, move_time: float = None,
+               storage: str = "bitboard") -> tuple:
+    """
+    Play a batch of games, the unit of work of a worker process. The players take turns at firing first.
+    :param board_size: The size of both boards
+    :type board_size: int
+    :param fleet: The lengths of the ships of both fleets
+    :type fleet: list
+    :param strategies: The strategy names of the two players
+    :type strategies: tuple
+    :param games: The number of games to play
+    :type games: int
+    :param seed: The seed of the random generator shared by the placements and the strategies
+    :type seed: int
+    :param move_time: Seconds a move may take, None for no limit
+    :type move_time: float
+    :param storage: The storage engine of the boards
+    :type storage: str
+    :return: The number of wins of each player and the histogram of the winners' shots
+    :rtype: tuple
+    """
+    random.seed(seed)
+    wins = [0, 0]
+    histogram = Counter()
+    for game in range(games):
+        winner, shots = play_game(board_size, fleet, strategies, game % 2, move_time, storage)
+        wins[winner] += 1
+        histogram[shots] += 1
+    return wins, histogram
+
+
+def run_self_play(games: int, board_size: int = 10, fleet: list = (5, 4, 3, 3, 2),
+                  strategies: tuple = ("weighted", "weighted"), workers: int = None, chunk_size: int = 250,
+                  move_time: float = None, storage: str = "bitboard", seed: int = None) -> SelfPlayReport:
+    """
+    Play games between two computer players spread over a process pool
+    :param games: The number of games to play
+    :type games: int
+    :param board_size: The size of both boards
+    :type board_size: int
+    :param fleet: The lengths of the ships of both fleets
+    :type fleet: list
+    :param strategies: The strategy names of the two players
+    :type strategies: tuple
+    :param workers: The number of processes, defaults to the number of CPUs, 1 plays in the calling process
+    :type workers: int
+    :param chunk_size: The number of games sent to a worker at once
+    :type chunk_size: int
+    :param move_time: Seconds a move may take, None for no limit
+    :type move_time: float
+    :param storage: The storage engine of the boards
+    :type storage: str
+    :param seed: The seed the seeds of the chunks are drawn from, None for a random run
+    :type seed: int
+    :return: The report of the run
+    :rtype: SelfPlayReport
+    """
+    strategies = tuple(strategies)
+    if len(strategies) != 2:
+        raise ValueError("Self-play needs exactly two strategies")
+    for strategy in strategies:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown AI strategy: {strategy}")
+    fleet = list(fleet)
+    workers = workers or os.cpu_count() or 1
+    rng = random.Random(seed)
+    chunks = [min(chunk_size, games - start) for start in range(0, games, chunk_size)]
+    arguments = [(board_size, fleet, strategies, chunk, rng.getrandbits(32), move_time, storage) for chunk in chunks]
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [play_games(*chunk_arguments) for chunk_arguments in arguments]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(play_games, *zip(*arguments)))
+    seconds = time.perf_counter() - start
+
+    wins = [0, 0]
+    histogram = Counter()
+    for chunk_wins, chunk_histogram in results:
+        wins[0] += chunk_wins[0]
+        wins[1] += chunk_wins[1]
+        histogram.update(chunk_histogram)
+    return SelfPlayReport(games, seconds, tuple(wins), histogram)
+
+
+def format_report(report: SelfPlayReport, strategies: tuple, width: int = 50) -> str:
+    """
+    Format a report with a text histogram of the shots to win
+    :param report: The report of a run
+    :type report: SelfPlayReport
+    :param strategies: The strategy names of the two players
+    :type strategies: tuple
+    :param width: The number of characters of the longest bar
+    :type width: int
+    :return: The formatted report
+    :rtype: str
+    """
+    lines = [f"{report.games} games in {report.seconds:.2f}s ({report.games_per_second:.0f} games/s)",
+             f"Wins: {strategies[0]} {report.wins[0]}, {strategies[1]} {report.wins[1]}",
+             f"Mean shots to win: {report.mean_shots:.2f}"]
+    most = max(report.histogram.values(), default=0)
+    for shots in sorted(report.histogram):
+        count = report.histogram[shots]
+        lines.append(f"{shots:4} {count:7} {'#' * max(1, count * width // most)}")
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Play computer against computer without a UI")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--board-size", type=int, default=10)
+    parser.add_argument("--fleet", default="5,4,3,3,2", help="Comma-separated ship lengths")
+    parser.add_argument("--strategies", nargs=2, default=["weighted", "weighted"], choices=sorted(STRATEGIES))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=250)
+    parser.add_argument("--move-time", type=float, default=None)
+    parser.add_argument("--storage", default="bitboard")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    fleet = [int(length) for length in args.fleet.split(",")]
+    report = run_self_play(args.games, args.board_size, fleet, args.strategies, args.workers, args.chunk_size,
+                           args.move_time, args.storage, args.seed)
+    print(format_report(report, args.strategies))
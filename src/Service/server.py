@@ -0,0 +1,305 @@
+import argparse
+import asyncio
+import json
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from dataclasses import replace
+
+from src.Service.config import GameConfig, config_from_args
+from src.Service.engine import Action, GameEngine, OVER
+
+DEFAULT_PORT = 8765
+# The longest request line accepted, longer ones close the connection
+MAX_LINE = 4096
+# Requests of one connection being handled at once, the connection is not read further until one is answered
+MAX_PENDING = 64
+# The settings a client may choose for its game and their types
+SESSION_OPTIONS = {"board_size": int, "battleships": int, "battle_ship_length": list, "ai_strategy": str}
+
+
+class Session:
+    """
+    A game hosted by the server. The lock keeps the requests of a session in order, as a move of the computer
+    runs on the executor while the next request may already be read.
+    """
+    def __init__(self, engine: GameEngine):
+        self.engine = engine
+        self.lock = asyncio.Lock()
+        self.last_active = time.monotonic()
+
+
+def _integer(request: dict, name: str) -> int:
+    value = request.get(name)
+    if type(value) is not int:
+        raise ValueError(f"Invalid {name}")
+    return value
+
+
+def _view(engine: GameEngine) -> dict:
+    """
+    Get what the player may see of a game, the computer's ships are hidden
+    :param engine: The game
+    :type engine: GameEngine
+    :return: The state as plain values, boards as rows of cells
+    :rtype: dict
+    """
+    size = engine.player_board.get_size
+    return {
+        "phase": engine.phase,
+        "winner": engine.winner,
+        "ships_to_place": engine.ships_to_place,
+        "player_hits": engine.player_hits,
+        "player_misses": engine.player_misses,
+        "computer_hits": engine.computer_hits,
+        "computer_misses": engine.computer_misses,
+        "board": [[engine.player_board.get_cell(row, column) for column in range(size)] for row in range(size)],
+        "target": [[min(engine.computer_board.get_cell(row, column), 0) for column in range(size)]
+                   for row in range(size)],
+    }
+
+
+class GameServer:
+    """
+    Hosts games against the computer over TCP, one JSON object per line each way. Every request is answered
+    with {"ok": true, ...} or {"ok": false, "error": "..."}, echoing its "id" if it has one, and several
+    requests may be in flight on one connection:
+
+    {"op": "new", "options": {"board_size": 10}}       -> "session", "board_size", "ships_to_place", "phase"
+    {"op": "place", "session": s, "x": 0, "y": 0, "direction": "h", "length": 3}   -> "events", "phase"
+    {"op": "fire", "session": s, "x": 4, "y": 2}       -> "events" (with the computer's answer), "phase"
+    {"op": "state", "session": s}                      -> "state"
+    {"op": "close", "session": s}
+    {"op": "stats"}                                    -> "sessions", "games", "moves", "cpu_seconds"
+
+    Sessions outlive connections and are closed after idle_timeout seconds without a request. Moves of the
+    computer run on the executor, so a slow move never holds up the other sessions.
+    """
+    def __init__(self, config: GameConfig, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                 idle_timeout: float = 300.0, max_sessions: int = 10000, max_board_size: int = 100,
+                 threads: int = None):
+        """
+        :param config: The settings of the games, a client may change those in SESSION_OPTIONS
+        :type config: GameConfig
+        :param host: The address to listen on
+        :type host: str
+        :param port: The port to listen on, 0 for any free port
+        :type port: int
+        :param idle_timeout: Seconds a session or a connection may stay without a request
+        :type idle_timeout: float
+        :param max_sessions: The number of sessions hosted at once, new ones are refused beyond
+        :type max_sessions: int
+        :param max_board_size: The largest board a client may ask for
+        :type max_board_size: int
+        :param threads: The threads the moves of the computer run on, None for the executor's default
+        :type threads: int
+        """
+        # The players are anonymous, so they do not share a placement habits profile
+        self.__config = replace(config, player_profile="")
+        self.__host = host
+        self.__port = port
+        self.__idle_timeout = idle_timeout
+        self.__max_sessions = max_sessions
+        self.__max_board_size = max_board_size
+        self.__executor = ThreadPoolExecutor(threads, thread_name_prefix="computer")
+        self.__sessions = {}
+        self.__connections = {}
+        self.__server = None
+        self.__reaper = None
+        self.__games = 0
+        self.__moves = 0
+
+    async def start(self) -> int:
+        """
+        Start listening
+        :return: The port listened on
+        :rtype: int
+        """
+        self.__server = await asyncio.start_server(self.__handle_connection, self.__host, self.__port,
+                                                   limit=MAX_LINE)
+        self.__reaper = asyncio.create_task(self.__reap())
+        return self.__server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        await self.__server.serve_forever()
+
+    async def close(self) -> None:
+        """
+        Stop listening, drop the connections and close every session
+        """
+        self.__reaper.cancel()
+        self.__server.close()
+        for writer in self.__connections.values():
+            writer.close()
+        # Their reads end once the writers are closed
+        if self.__connections:
+            await asyncio.wait(list(self.__connections), timeout=5)
+        await self.__server.wait_closed()
+        for session in self.__sessions.values():
+            session.engine.close()
+        self.__sessions.clear()
+        self.__executor.shutdown(wait=False)
+
+    async def __reap(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.__idle_timeout / 2, 60))
+            self.close_idle_sessions()
+
+    def close_idle_sessions(self) -> int:
+        """
+        Close the sessions without a request for idle_timeout seconds
+        :return: The number of sessions closed
+        :rtype: int
+        """
+        deadline = time.monotonic() - self.__idle_timeout
+        idle = [key for key, session in self.__sessions.items()
+                if session.last_active < deadline and not session.lock.locked()]
+        for key in idle:
+            self.__sessions.pop(key).engine.close()
+        return len(idle)
+
+    async def __handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.__connections[asyncio.current_task()] = writer
+        write_lock = asyncio.Lock()
+        pending = set()
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.__idle_timeout)
+                except (asyncio.TimeoutError, ValueError, ConnectionError):
+                    # Idle, over MAX_LINE or reset
+                    break
+                if not line:
+                    break
+                task = asyncio.create_task(self.__respond(line, writer, write_lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                if len(pending) >= MAX_PENDING:
+                    await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if pending:
+                await asyncio.wait(pending)
+        finally:
+            self.__connections.pop(asyncio.current_task(), None)
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def __respond(self, line: bytes, writer: asyncio.StreamWriter, write_lock: asyncio.Lock) -> None:
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = None
+        if isinstance(request, dict):
+            response = await self.handle(request)
+        else:
+            response = {"ok": False, "error": "Invalid JSON"}
+        data = json.dumps(response, separators=(",", ":")).encode() + b"\n"
+        async with write_lock:
+            with suppress(ConnectionError):
+                writer.write(data)
+                await writer.drain()
+
+    async def handle(self, request: dict) -> dict:
+        """
+        Answer a request, as sent over a connection
+        :param request: The decoded request
+        :type request: dict
+        :return: The response
+        :rtype: dict
+        """
+        try:
+            response = await self.__dispatch(request)
+            response["ok"] = True
+        except ValueError as e:
+            response = {"ok": False, "error": str(e)}
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    async def __dispatch(self, request: dict) -> dict:
+        op = request.get("op")
+        if op == "new":
+            return self.__new(request.get("options") or {})
+        if op == "stats":
+            return {"sessions": len(self.__sessions), "games": self.__games, "moves": self.__moves,
+                    "cpu_seconds": time.process_time()}
+        key = request.get("session")
+        session = self.__sessions.get(key) if isinstance(key, str) else None
+        if session is None:
+            raise ValueError("Unknown session")
+        async with session.lock:
+            session.last_active = time.monotonic()
+            engine = session.engine
+            if op == "place":
+                action = Action.place(_integer(request, "x"), _integer(request, "y"), str(request.get("direction")),
+                                      _integer(request, "length"))
+                events = engine.apply(action)
+            elif op == "fire":
+                action = Action.fire(_integer(request, "x"), _integer(request, "y"))
+                loop = asyncio.get_running_loop()
+                events = await loop.run_in_executor(self.__executor, engine.apply, action)
+                self.__moves += 1
+                if engine.phase == OVER:
+                    self.__games += 1
+            elif op == "state":
+                return {"state": _view(engine)}
+            elif op == "close":
+                del self.__sessions[key]
+                engine.close()
+                return {}
+            else:
+                raise ValueError(f"Unknown op {op}")
+            session.last_active = time.monotonic()
+        return {"events": [event._asdict() for event in events], "phase": engine.phase}
+
+    def __new(self, options: dict) -> dict:
+        if len(self.__sessions) >= self.__max_sessions:
+            raise ValueError("Too many sessions")
+        if not isinstance(options, dict):
+            raise ValueError("Invalid options")
+        for name, value in options.items():
+            if name not in SESSION_OPTIONS or type(value) is not SESSION_OPTIONS[name]:
+                raise ValueError(f"Invalid option {name}")
+        if not all(type(length) is int for length in options.get("battle_ship_length", ())):
+            raise ValueError("Invalid option battle_ship_length")
+        config = replace(self.__config, **options)
+        if config.board_size > self.__max_board_size:
+            raise ValueError("Invalid option board_size")
+        if config.battleships > config.board_size * config.board_size:
+            raise ValueError("Invalid option battleships")
+        engine = GameEngine(config)
+        try:
+            # Placed now, so a fleet that does not fit is refused here rather than on the player's last ship
+            engine.place_computer_battleships()
+        except ValueError:
+            engine.close()
+            raise
+        key = secrets.token_hex(8)
+        self.__sessions[key] = Session(engine)
+        return {"session": key, "board_size": config.board_size, "ships_to_place": engine.ships_to_place,
+                "phase": engine.phase}
+
+
+async def serve(server: GameServer) -> None:
+    port = await server.start()
+    print(f"Listening on port {port}", flush=True)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Host games against the computer over newline-delimited JSON",
+                                     epilog="Other arguments set the game settings, e.g. --ai-strategy density")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 for any free port")
+    parser.add_argument("--idle-timeout", type=float, default=300.0)
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    parser.add_argument("--max-board-size", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=None, help="Threads the moves of the computer run on")
+    args, config_args = parser.parse_known_args()
+    with suppress(KeyboardInterrupt):
+        asyncio.run(serve(GameServer(config_from_args(config_args), args.host, args.port, args.idle_timeout,
+                                     args.max_sessions, args.max_board_size, args.threads)))
@@ -0,0 +1,279 @@
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from src.Service.density_targeting import DensityTargeting
+from src.Service.monte_carlo_targeting import MonteCarloTargeting
+from src.Service.weighted_sampler import WeightedSampler
+
+STRATEGIES = {}
+# Resolution of the integer sampler weights scaled by a prior
+PRIOR_SCALE = 16
+
+
+def register_strategy(name: str):
+    """
+    Class decorator adding a targeting strategy to STRATEGIES, so it can be selected by name in the settings
+    :param name: The name of the strategy
+    :type name: str
+    """
+    def register(strategy_class):
+        STRATEGIES[name] = strategy_class
+        return strategy_class
+    return register
+
+
+def create_strategy(name: str, board_size: int, fleet: list, **options) -> "TargetingStrategy":
+    """
+    Create a registered targeting strategy
+    :param name: The name of the strategy
+    :type name: str
+    :param board_size: The size of the board being attacked
+    :type board_size: int
+    :param fleet: The lengths of the ships on the board being attacked
+    :type fleet: list
+    :param options: Keyword arguments of the strategy
+    :return: The strategy
+    :rtype: TargetingStrategy
+    """
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown AI strategy: {name}")
+    return STRATEGIES[name](board_size, fleet, **options)
+
+
+class TargetingStrategy(ABC):
+    """
+    Picks the computer's next shot when there is no hit ship to finish off. Strategies work in anytime
+    fashion: choose gets a deadline and returns the best move found by then. Every strategy takes an optional
+    prior, a multiplier per cell y * size + x of how likely it is to hold a ship, e.g. from PlacementHabits.
+    """
+    def __init__(self, board_size: int, fleet: list):
+        self._board_size = board_size
+        self._fleet = list(fleet)
+
+    @abstractmethod
+    def choose(self, deadline: float) -> tuple or None:
+        """
+        Pick the next shot
+        :param deadline: The time.perf_counter() value by which a move must be returned
+        :type deadline: float
+        :return: The x and y coordinates, None if the strategy has no move to suggest
+        :rtype: tuple
+        """
+        pass
+
+    def observe(self, x: int, y: int, result) -> None:
+        """
+        Learn from the result of a shot, whichever way it was chosen
+        :param x: x-coordinate of the shot
+        :type x: int
+        :param y: y-coordinate of the shot
+        :type y: int
+        :param result: The result of the shot
+        :type result: ShotResult
+        :return: None
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Release the resources held by the strategy
+        """
+        pass
+
+    @classmethod
+    def opening(cls, board_size: int, fleet: list, length: int) -> list or None:
+        """
+        Precompute the moves the strategy opens with while every shot misses, for the opening book.
+        The moves of an empty board must not depend on the orientation of the board.
+        :param board_size: The size of the board being attacked
+        :type board_size: int
+        :param fleet: The lengths of the ships on the board being attacked
+        :type fleet: list
+        :param length: The number of moves to precompute
+        :type length: int
+        :return: The cells y * size + x of the moves, None if the strategy has no fixed opening
+        :rtype: list
+        """
+        return None
+
+
+def _center_weights(board_size: int) -> list:
+    """
+    Generate weights for prioritizing the center of the board
+    :param board_size: The size of the board
+    :type board_size: int
+    :return: List of weights for each row or column
+    :rtype: list
+    """
+    center = board_size // 2
+    return [center - abs(center - i) for i in range(board_size)]
+
+
+def _corner_weights(board_size: int) -> list:
+    """
+    Generate weights for prioritizing the corners of the board
+    :param board_size: The size of the board
+    :type board_size: int
+    :return: Returns a list of weights for each row or column
+    :rtype: list
+    """
+    weights = [1] * board_size
+    weights[0] += 3  # Top-left corner
+    weights[-1] += 3  # Top-right corner
+    weights[board_size // 2] += 2  # Middle rows
+    return weights
+
+
+def _cell_weights(board_size: int) -> list:
+    """
+    Weight every cell. The row and the column are weighted independently by the combined center
+    and corner weights, so a cell weighs their product.
+    :param board_size: The size of the board
+    :type board_size: int
+    :return: The weight of every cell y * size + x
+    :rtype: list
+    """
+    weights = [cw + cc for cw, cc in zip(_center_weights(board_size), _corner_weights(board_size))]
+    return [wy * wx for wy in weights for wx in weights]
+
+
+@lru_cache(maxsize=16)
+def _cell_sampler(board_size: int) -> WeightedSampler:
+    """
+    Build, once per board size, a sampler over the cell weights
+    :param board_size: The size of the board
+    :type board_size: int
+    :return: A sampler to copy for every game
+    :rtype: WeightedSampler
+    """
+    return WeightedSampler(_cell_weights(board_size))
+
+
+def _apply_prior(weights: list, prior: list) -> list:
+    """
+    Scale integer weights by a prior, keeping every cell with a weight possible
+    """
+    return [max(1, round(weight * multiplier * PRIOR_SCALE)) if weight else 0
+            for weight, multiplier in zip(weights, prior)]
+
+
+@register_strategy("weighted")
+class WeightedStrategy(TargetingStrategy):
+    """
+    Random cells weighted towards the center and corners of the board
+    """
+    def __init__(self, board_size: int, fleet: list, rng: random.Random = random, prior: list = None):
+        super().__init__(board_size, fleet)
+        if prior is None:
+            self.__sampler = _cell_sampler(board_size).copy()
+        else:
+            self.__sampler = WeightedSampler(_apply_prior(_cell_weights(board_size), prior))
+        self.__rng = rng
+
+    def choose(self, deadline: float) -> tuple or None:
+        cell = self.__sampler.sample(self.__rng)
+        if cell is None:
+            return None
+        return cell % self._board_size, cell // self._board_size
+
+    def observe(self, x: int, y: int, result) -> None:
+        self.__sampler.remove(y * self._board_size + x)
+
+
+@register_strategy("density")
+class DensityStrategy(TargetingStrategy):
+    """
+    The cell covered by the most legal placements of the ships still afloat
+    """
+    def __init__(self, board_size: int, fleet: list, rng: random.Random = random, prior: list = None):
+        super().__init__(board_size, fleet)
+        self.__density = DensityTargeting(board_size, fleet, rng, prior)
+        self.__ship_hits = Counter()
+
+    def choose(self, deadline: float) -> tuple or None:
+        return self.__density.best()
+
+    @classmethod
+    def opening(cls, board_size: int, fleet: list, length: int) -> list or None:
+        density = DensityTargeting(board_size, fleet, random.Random(0))
+        moves = []
+        for _ in range(length):
+            move = density.best()
+            if move is None:
+                break
+            density.record_shot(*move)
+            moves.append(move[1] * board_size + move[0])
+        return moves
+
+    def observe(self, x: int, y: int, result) -> None:
+        self.__density.record_shot(x, y)
+        if result.hit and result.ship_number is not None:
+            self.__ship_hits[result.ship_number] += 1
+            if result.sunk:
+                self.__density.record_sunk(self.__ship_hits[result.ship_number])
+
+
+@register_strategy("monte_carlo")
+class MonteCarloStrategy(TargetingStrategy):
+    """
+    The cell covered most often by sampled layouts consistent with the shots so far.
+    Sampling stops at the deadline, so the move uses whatever time the budget leaves.
+    """
+    def __init__(self, board_size: int, fleet: list, samples: int = 2000, time_limit: float = 0.5,
+                 workers: int = 1, rng: random.Random = random, prior: list = None):
+        super().__init__(board_size, fleet)
+        self.__monte_carlo = MonteCarloTargeting(board_size, samples, time_limit, workers, rng, prior)
+        self.__time_limit = time_limit
+        self.__fired = set()
+        self.__ship_cells = defaultdict(list)
+        self.__sunk_ships = set()
+
+    def choose(self, deadline: float) -> tuple or None:
+        time_limit = max(0.0, min(self.__time_limit, deadline - time.perf_counter()))
+        lengths = Counter(self._fleet)
+        lengths.subtract(len(self.__ship_cells[ship]) for ship in self.__sunk_ships)
+        required = [cell for ship, cells in self.__ship_cells.items() if ship not in self.__sunk_ships
+                    for cell in cells]
+        blocked = list(self.__fired.difference(required))
+        return self.__monte_carlo.best(list(lengths.elements()), blocked, required, time_limit)
+
+    def observe(self, x: int, y: int, result) -> None:
+        self.__fired.add((x, y))
+        # Hits without a ship number only block placements
+        if result.hit and result.ship_number is not None:
+            self.__ship_cells[result.ship_number].append((x, y))
+            if result.sunk:
+                self.__sunk_ships.add(result.ship_number)
+
+    def close(self) -> None:
+        self.__monte_carlo.close()
+
+
+@register_strategy("parity")
+class ParityStrategy(TargetingStrategy):
+    """
+    Uniformly random cells of one colour of a checkerboard: every ship of length 2 or more covers one of them,
+    so the other colour is only tried once this one is exhausted. Mirrors the hunt of the batched simulator.
+    """
+    def __init__(self, board_size: int, fleet: list, rng: random.Random = random, prior: list = None):
+        super().__init__(board_size, fleet)
+        cells = range(board_size * board_size)
+        self.__samplers = []
+        for colour in (0, 1):
+            weights = [int((cell % board_size + cell // board_size) % 2 == colour) for cell in cells]
+            self.__samplers.append(WeightedSampler(weights if prior is None else _apply_prior(weights, prior)))
+        self.__rng = rng
+
+    def choose(self, deadline: float) -> tuple or None:
+        for sampler in self.__samplers:
+            cell = sampler.sample(self.__rng)
+            if cell is not None:
+                return cell % self._board_size, cell // self._board_size
+        return None
+
+    def observe(self, x: int, y: int, result) -> None:
+        for sampler in self.__samplers:
+            sampler.remove(y * self._board_size + x)
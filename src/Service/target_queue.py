@@ -0,0 +1,60 @@
+import heapq
+from itertools import count
+
+
+class TargetQueue:
+    """
+    Cells next to hits, waiting to be fired at. The cells touching the most hits come first,
+    ties in the order they were queued. A membership index holds the current priority of every
+    queued cell, so duplicates are merged and stale heap entries are skipped in O(1).
+    """
+    def __init__(self, board_size: int):
+        """
+        :param board_size: The size of the board being attacked
+        :type board_size: int
+        """
+        self.__board_size = board_size
+        self.__heap = []
+        self.__priorities = {}
+        self.__order = count()
+
+    def add_hit(self, x: int, y: int, fired: set) -> None:
+        """
+        Queue the cells around a hit, or raise their priority if they are already queued
+        :param x: x-coordinate of the hit
+        :type x: int
+        :param y: y-coordinate of the hit
+        :type y: int
+        :param fired: The cells already fired at
+        :type fired: set
+        :return: None
+        """
+        for move in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if 0 <= move[0] < self.__board_size and 0 <= move[1] < self.__board_size and move not in fired:
+                priority = self.__priorities.get(move, 0) + 1
+                self.__priorities[move] = priority
+                heapq.heappush(self.__heap, (-priority, next(self.__order), move))
+
+    def pop(self, fired: set) -> tuple or None:
+        """
+        Take the best queued cell that was not fired at yet
+        :param fired: The cells already fired at
+        :type fired: set
+        :return: The coordinates of the cell, None if the queue is empty
+        :rtype: tuple
+        """
+        while self.__heap:
+            neg_priority, _, move = heapq.heappop(self.__heap)
+            if self.__priorities.get(move) != -neg_priority:
+                continue
+            del self.__priorities[move]
+            if move not in fired:
+                return move
+        return None
+
+    def clear(self) -> None:
+        self.__heap.clear()
+        self.__priorities.clear()
+
+    def __len__(self) -> int:
+        return len(self.__priorities)
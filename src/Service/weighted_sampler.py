@@ -0,0 +1,75 @@
+import random
+
+
+class WeightedSampler:
+    """
+    Fenwick tree over integer weights. Sampling an index proportionally to its weight and
+    removing an index both take O(log n).
+    """
+    def __init__(self, weights: list):
+        """
+        :param weights: The non negative integer weight of every index
+        :type weights: list
+        """
+        size = len(weights)
+        self.__weights = list(weights)
+        tree = [0] + self.__weights
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self.__tree = tree
+        self.__total = sum(self.__weights)
+        self.__top_step = 1 << size.bit_length() if size else 0
+
+    def copy(self) -> "WeightedSampler":
+        sampler = WeightedSampler.__new__(WeightedSampler)
+        sampler.__weights = self.__weights.copy()
+        sampler.__tree = self.__tree.copy()
+        sampler.__total = self.__total
+        sampler.__top_step = self.__top_step
+        return sampler
+
+    def remove(self, index: int) -> None:
+        """
+        Set the weight of an index to 0 so it is never sampled again
+        :param index: The index to remove
+        :type index: int
+        :return: None
+        """
+        weight = self.__weights[index]
+        if not weight:
+            return
+        self.__weights[index] = 0
+        self.__total -= weight
+        tree = self.__tree
+        i = index + 1
+        while i < len(tree):
+            tree[i] -= weight
+            i += i & -i
+
+    def sample(self, rng: random.Random = random) -> int or None:
+        """
+        Pick an index with probability proportional to its weight
+        :param rng: The random generator to use
+        :type rng: random.Random
+        :return: The index, None if every weight is 0
+        :rtype: int
+        """
+        if self.__total <= 0:
+            return None
+        remaining = rng.randrange(self.__total)
+        tree = self.__tree
+        position = 0
+        step = self.__top_step
+        while step:
+            following = position + step
+            if following < len(tree) and tree[following] <= remaining:
+                position = following
+                remaining -= tree[following]
+            step >>= 1
+        return position
+
+    @property
+    def total(self) -> int:
+        return self.__total
@@ -0,0 +1,289 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from typing import NamedTuple
+
+from src.Service.computer_player import ComputerPlayer
+from src.Service.self_play import play_game
+from src.board.board import Board, ComputerBoard, PlayerBoard
+from src.board.placement import PlacementEngine
+
+BASELINE_VERSION = 1
+
+
+class Baseline(NamedTuple):
+    """
+    Saved benchmark results and the storage engine they were taken with, results only compare on the same one
+    """
+    storage: str
+    results: dict
+FLEET = [5, 4, 3, 3, 2]
+SIZES = (6, 10, 100, 1000)
+# Whole games need about size * size shots, so they stop at this size
+MAX_GAME_SIZE = 100
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str, max_size: int = None):
+    """
+    Function decorator adding a benchmark to BENCHMARKS. The function takes a board size and a storage engine
+    and returns a prepare function, called outside the timing, which returns the function to time and the
+    number of operations it performs.
+    :param name: The name of the benchmark
+    :type name: str
+    :param max_size: The largest board size the benchmark runs on, None for any
+    :type max_size: int
+    """
+    def register(function):
+        BENCHMARKS[name] = (function, max_size)
+        return function
+    return register
+
+
+def _layout(size: int) -> list:
+    return PlacementEngine(size).layout(FLEET)
+
+
+def _fleet_board(size: int, storage: str, board_class=ComputerBoard) -> Board:
+    board = board_class(size, storage)
+    for index, (x, y, direction, length) in enumerate(_layout(size), 1):
+        Board.place_battleships(board, length, x, y, direction, index)
+    return board
+
+
+@benchmark("place_battleships")
+def _place_battleships(size: int, storage: str):
+    layout = _layout(size)
+
+    def prepare():
+        board = ComputerBoard(size, storage)
+
+        def run():
+            for index, (x, y, direction, length) in enumerate(layout, 1):
+                board.place_battleships(length, x, y, direction, index)
+        return run, len(layout)
+    return prepare
+
+
+@benchmark("check_hit")
+def _check_hit(size: int, storage: str):
+    def prepare():
+        board = _fleet_board(size, storage)
+        cells = random.sample(range(size * size), min(1000, size * size))
+
+        def run():
+            for cell in cells:
+                board.check_hit(cell % size, cell // size)
+        return run, len(cells)
+    return prepare
+
+
+@benchmark("check_ship_sunk")
+def _check_ship_sunk(size: int, storage: str):
+    board = _fleet_board(size, storage)
+    ship_numbers = list(range(1, len(FLEET) + 1)) * 200
+
+    def prepare():
+        def run():
+            for ship_number in ship_numbers:
+                board.check_ship_sunk(ship_number)
+        return run, len(ship_numbers)
+    return prepare
+
+
+@benchmark("computer_place_battleships")
+def _computer_place_battleships(size: int, storage: str):
+    def prepare():
+        computer = ComputerPlayer(ComputerBoard(size, storage))
+        return lambda: computer.place_battleships(len(FLEET), FLEET), 1
+    return prepare
+
+
+def _ai_move(strategy: str):
+    def bench(size: int, storage: str):
+        def prepare():
+            board = _fleet_board(size, storage, PlayerBoard)
+            computer = ComputerPlayer(_fleet_board(size, storage), strategy)
+            moves = min(20, size * size // 2)
+
+            def run():
+                for _ in range(moves):
+                    computer.fire(board)
+            return run, moves
+        return prepare
+    return bench
+
+
+for _strategy in ("weighted", "parity", "density"):
+    benchmark(f"ai_move_{_strategy}")(_ai_move(_strategy))
+
+
+@benchmark("render")
+def _render(size: int, storage: str):
+    def prepare():
+        board = _fleet_board(size, storage, PlayerBoard)
+        return lambda: str(board), 1
+    return prepare
+
+
+@benchmark("render_after_shot")
+def _render_after_shot(size: int, storage: str):
+    def prepare():
+        board = _fleet_board(size, storage, PlayerBoard)
+        str(board)
+        cells = random.sample(range(size * size), min(20, size * size))
+
+        def run():
+            for cell in cells:
+                board.check_hit(cell % size, cell // size)
+                str(board)
+        return run, len(cells)
+    return prepare
+
+
+@benchmark("game", MAX_GAME_SIZE)
+def _game(size: int, storage: str):
+    def prepare():
+        return lambda: play_game(size, FLEET, ("weighted", "weighted"), storage=storage), 1
+    return prepare
+
+
+def run_benchmarks(sizes: tuple = SIZES, names: list = None, repeat: int = 5, storage: str = "grid",
+                   report=None) -> dict:
+    """
+    Time the benchmarks, keeping the best of several rounds
+    :param sizes: The board sizes
+    :type sizes: tuple
+    :param names: The benchmarks to run, None for all of BENCHMARKS
+    :type names: list
+    :param repeat: The number of rounds of every benchmark
+    :type repeat: int
+    :param storage: The storage engine of the boards
+    :type storage: str
+    :param report: Called with the key and the seconds per operation of every benchmark as it finishes
+    :type report: callable
+    :return: The seconds per operation, keyed by "name/size"
+    :rtype: dict
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            raise ValueError(f"Unknown benchmark: {name}")
+        function, max_size = BENCHMARKS[name]
+        for size in sizes:
+            if max_size is not None and size > max_size or max(FLEET) > size:
+                continue
+            random.seed(size)
+            prepare = function(size, storage)
+            best = float("inf")
+            for _ in range(repeat):
+                # Every round does the same work, whole games included
+                random.seed(size)
+                run, operations = prepare()
+                start = time.perf_counter()
+                run()
+                best = min(best, (time.perf_counter() - start) / operations)
+            key = f"{name}/{size}"
+            results[key] = best
+            if report:
+                report(key, best)
+    return results
+
+
+def save_baseline(path: str, results: dict, storage: str = "grid") -> None:
+    """
+    Save benchmark results as the JSON baseline
+    :param path: The path of the baseline
+    :type path: str
+    :param results: The results of run_benchmarks
+    :type results: dict
+    :param storage: The storage engine the results were taken with
+    :type storage: str
+    :return: None
+    """
+    with open(path, "w") as f:
+        json.dump({"version": BASELINE_VERSION, "python": platform.python_version(), "storage": storage,
+                   "results": results}, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> Baseline:
+    """
+    Load a JSON baseline
+    :param path: The path of the baseline
+    :type path: str
+    :return: The storage engine and the seconds per operation, keyed by "name/size"
+    :rtype: Baseline
+    """
+    with open(path, "r") as f:
+        baseline = json.load(f)
+    if baseline.get("version") != BASELINE_VERSION:
+        raise ValueError(f"Unsupported baseline version {baseline.get('version')}")
+    return Baseline(baseline.get("storage", "grid"), baseline["results"])
+
+
+def compare(results: dict, baseline: Baseline, threshold: float = 0.25, storage: str = "grid") -> list:
+    """
+    Find the benchmarks slower than their baseline by more than the threshold
+    :param results: The results of run_benchmarks
+    :type results: dict
+    :param baseline: The baseline
+    :type baseline: Baseline
+    :param threshold: The tolerated slowdown, 0.25 fails above 125% of the baseline time
+    :type threshold: float
+    :param storage: The storage engine the results were taken with
+    :type storage: str
+    :return: (key, seconds, baseline seconds) of every regression
+    :rtype: list
+    :raises ValueError: If the baseline was taken with another storage engine
+    """
+    if baseline.storage != storage:
+        raise ValueError(f"The baseline was taken with the {baseline.storage} storage, not {storage}")
+    return [(key, seconds, baseline.results[key]) for key, seconds in results.items()
+            if key in baseline.results and seconds > baseline.results[key] * (1 + threshold)]
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Time the board, the computer player and whole games")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="The benchmarks to run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--storage", default="grid")
+    parser.add_argument("--baseline", help="Fail when a result is slower than in this JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Tolerated slowdown, 0.25 for 25%%")
+    parser.add_argument("--save", help="Save the results as a JSON baseline")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(args.baseline) if args.baseline else Baseline(args.storage, {})
+    if baseline.storage != args.storage:
+        # Refused before running, the times of different storage engines say nothing about each other
+        parser.error(f"the baseline was taken with --storage {baseline.storage}, not {args.storage}")
+
+    def report(key, seconds):
+        line = f"{key:40} {_format_time(seconds):>10}"
+        if key in baseline.results:
+            seconds_before = baseline.results[key]
+            line += f" {_format_time(seconds_before):>10} {seconds / seconds_before - 1:+8.1%}"
+        print(line, flush=True)
+
+    results = run_benchmarks(args.sizes, args.only, args.repeat, args.storage, report)
+    if args.save:
+        save_baseline(args.save, results, args.storage)
+    regressions = compare(results, baseline, args.threshold, args.storage)
+    for key, seconds, baseline_seconds in regressions:
+        print(f"Regression: {key} took {_format_time(seconds)}, baseline {_format_time(baseline_seconds)}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from unittest.mock import patch
+
+from src.Service.computer_player import default_opening_book
+from src.benchmark import BENCHMARKS, Baseline, compare, load_baseline, main, run_benchmarks, save_baseline
+
+
+def setUpModule():
+    # The openings are written to a directory of the tests rather than the user's cache
+    directory = tempfile.TemporaryDirectory()
+    unittest.addModuleCleanup(directory.cleanup)
+    environ = patch.dict(os.environ, BATTLESHIPS_CACHE_DIR=directory.name)
+    environ.start()
+    unittest.addModuleCleanup(environ.stop)
+    default_opening_book.cache_clear()
+    unittest.addModuleCleanup(default_opening_book.cache_clear)
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_run_and_save(self):
+        results = run_benchmarks((6, 10), repeat=1)
+        self.assertEqual(len(results), 2 * len(BENCHMARKS))
+        self.assertTrue(all(seconds > 0 for seconds in results.values()))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            save_baseline(path, results, "sparse")
+            self.assertEqual(load_baseline(path), Baseline("sparse", results))
+            # A baseline of another storage engine is refused
+            with self.assertRaises(ValueError):
+                compare(results, load_baseline(path))
+            with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+                main(["--sizes", "6", "--repeat", "1", "--baseline", path])
+
+    def test_compare(self):
+        baseline = Baseline("grid", {"check_hit/6": 1.0, "render/6": 1.0})
+        results = {"check_hit/6": 1.2, "render/6": 1.5, "game/6": 9.0}
+        self.assertEqual(compare(results, baseline, 0.25), [("render/6", 1.5, 1.0)])
+        self.assertEqual(compare(results, baseline, 0.1), [("check_hit/6", 1.2, 1.0), ("render/6", 1.5, 1.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
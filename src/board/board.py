@@ -1,19 +1,38 @@
-from enum import Enum
+import copy
+import random
+
+from src.board.board_renderer import BoardRenderer
+from src.board.board_types import ShipDirection, ShotOutcome, ShotResult, HIT, MISS
+from src.board.legal_moves import LegalMoves
+from src.board.ship_registry import ShipRegistry
+from src.board.storage import create_storage
+from src.board.zobrist import zobrist_key
 
-class ShipDirection(Enum):
-    HORIZONTAL = 1
-    VERTICAL = 2
 
 class Board:
-    HIT =  -1
-    MISS = -2
+    HIT = HIT
+    MISS = MISS
     SHIP = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    SHOW_SHIPS = False
 
-    def __init__(self, board_size: int):
+    def __init__(self, board_size: int, storage: str = "grid"):
+        """
+        :param board_size: The size of the board
+        :type board_size: int
+        :param storage: The storage engine, "grid" (list of lists), "bitboard" (integer bitmasks),
+            "sparse" (only ship and fired cells, for huge mostly empty boards) or "numpy" (int8 array, for very large boards)
+        :type storage: str
+        """
         self._board_size = board_size
-        self._board = [[0 for _ in range(board_size)] for _ in range(board_size)]
-        self.__battleships = []
-        self._battleships_remaining = 0
+        self._storage_name = storage
+        self._storage = create_storage(storage, board_size)
+        self._ships = ShipRegistry()
+        self._legal_moves = LegalMoves(board_size * board_size)
+        self._renderer = BoardRenderer(board_size, self.SHOW_SHIPS)
+        self._zobrist = 0
+        self.__undo = []
+        # Boards sharing the storage since the last snapshot, the storage is copied on the next write
+        self.__shares = [1]
 
     def place_battleships(self, battle_ship_length: int, x: int, y: int, direction: ShipDirection, ship_number: int):
         """
@@ -32,15 +51,10 @@ class Board:
         """
         self.__validate_placement(battle_ship_length, direction, x, y)
 
-        # Place the ship
-        if direction == ShipDirection.HORIZONTAL:
-            for i in range(battle_ship_length):
-                self._board[y][x + i] = ship_number
-        else:
-            for i in range(battle_ship_length):
-                self._board[y + i][x] = ship_number
-        self.__battleships.append((x, y, direction, battle_ship_length, ship_number))
-        self._battleships_remaining += 1
+        self.__own_storage()
+        self._ships.add(ship_number, x, y, direction, battle_ship_length)
+        self._storage.place(x, y, direction, battle_ship_length, ship_number)
+        self._renderer.invalidate(y, 1 if direction == ShipDirection.HORIZONTAL else battle_ship_length)
 
     def __validate_placement(self, battle_ship_length, direction, x, y):
         """
@@ -56,44 +70,191 @@ class Board:
         :return: None
         """
         # Check if the coordinates are valid
+        if x < 0 or y < 0 or x >= self._board_size or y >= self._board_size:
+            raise ValueError("Ship cannot be placed")
         if direction == ShipDirection.HORIZONTAL and x + battle_ship_length > self._board_size:
             raise ValueError("Ship cannot be placed")
-        if direction == ShipDirection.VERTICAL and y + battle_ship_length > self._board_size:
+        if direction != ShipDirection.HORIZONTAL and y + battle_ship_length > self._board_size:
             raise ValueError("Ship cannot be placed")
         # Check if the ship overlaps with another ship
-        if direction == ShipDirection.HORIZONTAL:
-            for i in range(battle_ship_length):
-                if self._board[y][x + i] != 0:
-                    raise ValueError("Ship overlaps")
-        else:
-            for i in range(battle_ship_length):
-                if self._board[y + i][x] != 0:
-                    raise ValueError("Ship overlaps")
+        if not self._storage.is_free(x, y, direction, battle_ship_length):
+            raise ValueError("Ship overlaps")
 
-    def check_hit(self, x: int, y: int) -> (bool, int):
+    def is_legal_placement(self, battle_ship_length: int, x: int, y: int, direction: ShipDirection) -> bool:
+        """
+        Check if a ship fits on the board without overlapping another ship, without placing it
+        :param battle_ship_length: Indicates the length of the ship
+        :type battle_ship_length: int
+        :param x: Indicates the x coordinate of the ship
+        :type x: int
+        :param y: Indicates the y coordinate of the ship
+        :type y: int
+        :param direction: Indicates the direction of the ship
+        :type direction: ShipDirection
+        :return: True if the ship can be placed, False otherwise
+        :rtype: bool
+        """
+        try:
+            self.__validate_placement(battle_ship_length, direction, x, y)
+        except ValueError:
+            return False
+        return True
+
+    def check_hit(self, x: int, y: int) -> ShotResult:
         """
         Check if a hit is a hit or a miss
         :param x: Indicates the x coordinate of the hit
         :type x: int
         :param y: Indicates the y coordinate of the hit
         :type y: int
-        :return: Returns a tuple with a boolean indicating if the hit is a hit or a miss and the ship number if it is a hit
-        :rtype: tuple
+        :return: Returns the outcome of the shot (miss, hit or sunk), the ship number if a ship was hit and whether the game is over
+        :rtype: ShotResult
         """
         # Check if the coordinates are valid
         if y < 0 or y >= self._board_size or x < 0 or x >= self._board_size:
             raise ValueError("Invalid coordinates")
-        if self._board[y][x] == -1 or self._board[y][x] == -2:
-            raise ValueError("Already hit")
 
         # Check if the hit is a miss or a hit
-        if self._board[y][x] == 0:
-            self._board[y][x] = -2
-            return False, None
+        self.__own_storage()
+        cell = y * self._board_size + x
+        # Raises if the cell was already fired at
+        self._legal_moves.remove(cell)
+        boat = self._storage.fire(x, y)
+        self._renderer.invalidate(y)
+        self._zobrist ^= zobrist_key(cell, boat != 0)
+        if boat == 0:
+            return ShotResult(ShotOutcome.MISS, None, self._ships.afloat == 0)
+        if self._ships.hit(boat):
+            return ShotResult(ShotOutcome.SUNK, boat, self._ships.afloat == 0)
+        return ShotResult(ShotOutcome.HIT, boat, False)
+
+    def fire_many(self, xs, ys) -> tuple:
+        """
+        Fire a batch of shots at once, only supported by the numpy storage
+        :param xs: The x coordinates of the shots, of any shape as they are flattened
+        :type xs: array-like
+        :param ys: The y coordinates of the shots, of any shape as they are flattened
+        :type ys: array-like
+        :return: Arrays with the ShotOutcome value of every shot (0 if it was rejected) and the ship it sunk (0 if none)
+        :rtype: tuple
+        """
+        if not hasattr(self._storage, "fire_many"):
+            raise ValueError("Batch firing needs the numpy storage")
+        self.__own_storage()
+        self._renderer.invalidate_all()
+        outcomes, sunk = self._storage.fire_many(xs, ys, self._ships)
+        # Both computed before the board is updated, so the hash and the legal moves change together or not at all
+        delta = self._storage.zobrist_delta(xs, ys, outcomes)
+        cells = self._storage.accepted_cells(xs, ys, outcomes)
+        self._legal_moves.remove_many(cells)
+        self._zobrist ^= delta
+        return outcomes, sunk
+
+    def push_shot(self, x: int, y: int) -> ShotResult:
+        """
+        Fire at a cell and remember the shot so it can be taken back with pop_shot
+        :param x: Indicates the x coordinate of the hit
+        :type x: int
+        :param y: Indicates the y coordinate of the hit
+        :type y: int
+        :return: The result of the shot, as returned by check_hit
+        :rtype: ShotResult
+        """
+        result = self.check_hit(x, y)
+        self.__undo.append((x, y, result.ship_number or 0))
+        return result
+
+    def pop_shot(self) -> tuple:
+        """
+        Take back the last shot made with push_shot
+        :return: The coordinates of the shot that was taken back
+        :rtype: tuple
+        """
+        if not self.__undo:
+            raise ValueError("No shot to take back")
+        x, y, boat = self.__undo.pop()
+        self.__own_storage()
+        self._storage.unfire(x, y, boat)
+        self._legal_moves.restore(y * self._board_size + x)
+        if boat:
+            self._ships.unhit(boat)
+        self._renderer.invalidate(y)
+        self._zobrist ^= zobrist_key(y * self._board_size + x, boat != 0)
+        return x, y
+
+    def snapshot(self) -> "Board":
+        """
+        Take a copy-on-write snapshot of the board: the storage is shared until one of the boards changes
+        :return: A board of the same type with the same ships and shots and an empty undo stack
+        :rtype: Board
+        """
+        snapshot = copy.copy(self)
+        snapshot.__undo = []
+        snapshot._renderer = BoardRenderer(self._board_size, self.SHOW_SHIPS)
+        self.__shares[0] += 1
+        return snapshot
+
+    def __own_storage(self) -> None:
+        """
+        Copy the storage and registry before a write if another board still shares them
+        """
+        if self.__shares[0] > 1:
+            self.__shares[0] -= 1
+            self.__shares = [1]
+            self._storage = self._storage.copy()
+            self._ships = self._ships.copy()
+            self._legal_moves = self._legal_moves.copy()
 
-        boat = self._board[y][x]
-        self._board[y][x] = -1
-        return True, boat
+    @property
+    def zobrist_hash(self) -> int:
+        """
+        The Zobrist hash of the hits and misses on the board, kept up to date on every shot
+        """
+        return self._zobrist
+
+    def fired_cells(self) -> list:
+        """
+        Get the cells fired at so far
+        :return: A list of (x, y, hit) tuples
+        :rtype: list
+        """
+        cells = []
+        for index in self._storage.fired_cells():
+            x, y = index % self._board_size, index // self._board_size
+            cells.append((x, y, self._storage.cell(x, y) == HIT))
+        return cells
+
+    def is_legal_move(self, x: int, y: int) -> bool:
+        """
+        Check if a cell is on the board and was not fired at yet, without firing
+        :param x: Indicates the x coordinate of the cell
+        :type x: int
+        :param y: Indicates the y coordinate of the cell
+        :type y: int
+        :return: True if the cell can be fired at, False otherwise
+        :rtype: bool
+        """
+        return 0 <= x < self._board_size and 0 <= y < self._board_size and y * self._board_size + x in self._legal_moves
+
+    def random_legal_move(self, rng: random.Random = random) -> tuple or None:
+        """
+        Pick a cell that was not fired at yet uniformly at random
+        :param rng: The random generator to use
+        :type rng: random.Random
+        :return: The x and y coordinates, None if every cell was fired at
+        :rtype: tuple
+        """
+        cell = self._legal_moves.sample(rng)
+        if cell is None:
+            return None
+        return cell % self._board_size, cell // self._board_size
+
+    @property
+    def get_legal_moves(self) -> LegalMoves:
+        """
+        The index of the cells y * size + x not fired at yet, kept up to date on every shot
+        """
+        return self._legal_moves
 
     def check_ship_sunk(self, ship_number: int) -> bool:
         """
@@ -103,18 +264,7 @@ class Board:
         :return: Returns a boolean indicating if the ship is sunk
         :rtype: bool
         """
-        for x, y, direction, length, ship in self.__battleships:
-            if ship_number == ship:
-                if direction == ShipDirection.HORIZONTAL:
-                    for i in range(length):
-                        if self._board[y][x + i] != -1:
-                            return False
-                else:
-                    for i in range(length):
-                        if self._board[y + i][x] != -1:
-                            return False
-                return True
-        return False
+        return self._ships.is_sunk(ship_number)
 
     def check_game_over(self) -> bool:
         """
@@ -122,90 +272,50 @@ class Board:
         :return: True if the game is over, False otherwise
         :rtype: bool
         """
-        return self._battleships_remaining == 0
+        return self._ships.afloat == 0
 
     def get_cell(self, x, y):
-        return self._board[x][y]
+        # The first coordinate is the row, as the UIs index the board that way
+        return self._storage.cell(y, x)
 
     @property
     def get_size(self) -> int:
         return self._board_size
 
+    @property
+    def get_ship_count(self) -> int:
+        return len(self._ships)
+
+    @property
+    def get_fleet(self) -> list:
+        return [length for _, _, _, _, length in self._ships.placements()]
+
+    @property
+    def get_placements(self) -> list:
+        """
+        :return: The (ship number, x, y, direction, length) of every ship
+        :rtype: list
+        """
+        return self._ships.placements()
+
+    def __str__(self):
+        return self._renderer.render(self._storage)
+
 class PlayerBoard(Board):
-    def __init__(self, board_size: int):
-        super().__init__(board_size)
-        self._battleships_remaining = 0
+    SHOW_SHIPS = True
+
+    def __init__(self, board_size: int, storage: str = "grid"):
+        super().__init__(board_size, storage)
 
     def place_battleships(self, battle_ship_length: int, x: int, y: int, direction: str, ship_number: int):
         direction = direction.lower()
         direction = ShipDirection.HORIZONTAL if (direction == "h" or direction == "horizontal") else ShipDirection.VERTICAL if (direction == "v" or direction == "vertical") else None
         super().place_battleships(battle_ship_length, x, y, direction, ship_number)
 
-    def check_hit(self, x, y) -> (bool, int):
-        hit, boat = super().check_hit(x, y)
-        if hit:
-            if super().check_ship_sunk(boat):
-                self._battleships_remaining -= 1
-        return hit, boat
-
-    def __str__(self):
-        # Create the top margin line
-        board_str = "    " + "  ".join([str(i + 1).rjust(2) for i in range(self._board_size)]) + "\n"
-        board_str += "   +" + "---+" * self._board_size + "\n"
-
-        for y in range(self._board_size):
-            # Create each row with a left margin line
-            row_str = str(y + 1).rjust(2) + " |"
-            for cell in self._board[y]:
-                if cell == -1:
-                    row_str += " . |"
-                elif cell == -2:
-                    row_str += " X |"
-                elif cell == 0:
-                    row_str += "   |"
-                else:
-                    row_str += f" {cell} |"
-            row_str += "\n"
-            board_str += row_str
-            # Add a line between rows
-            board_str += "   +" + "---+" * self._board_size + "\n"
-        return board_str
-
-
 
 class ComputerBoard(Board):
-    def __init__(self, board_size: int):
-        super().__init__(board_size)
-        self._battleships_remaining = 0
+    def __init__(self, board_size: int, storage: str = "grid"):
+        super().__init__(board_size, storage)
 
     def place_battleships(self, battle_ship_length: int, x: int, y: int, direction: ShipDirection, ship_number: int):
         super().place_battleships(battle_ship_length, x, y, direction, ship_number)
-
-    def check_hit(self, x, y) -> (bool, int):
-       # print(self._battleships_remaining)
-        hit, boat = super().check_hit(x, y)
-        if hit:
-            if super().check_ship_sunk(boat):
-                self._battleships_remaining -= 1
-        return hit, boat
-
-    def __str__(self):
-        # Create the top margin line
-        board_str = "    " + "  ".join([str(i + 1).rjust(2) for i in range(self._board_size)]) + "\n"
-        board_str += "   +" + "---+" * self._board_size + "\n"
-
-        for y in range(self._board_size):
-            # Create each row with a left margin line
-            row_str = str(y + 1).rjust(2) + " |"
-            for cell in self._board[y]:
-                if cell == -1:
-                    row_str += " . |"
-                elif cell == -2:
-                    row_str += " X |"
-                else:
-                    row_str += "   |"
-            row_str += "\n"
-            board_str += row_str
-            # Add a line between rows
-            board_str += "   +" + "---+" * self._board_size + "\n"
-        return board_str
\ No newline at end of file
@@ -0,0 +1,76 @@
+from src.board.board_types import HIT, MISS
+
+
+class BoardRenderer:
+    """
+    Text rendering of a board shared by PlayerBoard and ComputerBoard.
+    Every rendered row is cached, a shot only re-renders the rows it made dirty.
+    """
+    def __init__(self, board_size: int, show_ships: bool):
+        """
+        :param board_size: The size of the board
+        :type board_size: int
+        :param show_ships: Whether ship numbers are shown or hidden as water
+        :type show_ships: bool
+        """
+        self.__board_size = board_size
+        self.__show_ships = show_ships
+        self.__separator = "   +" + "---+" * board_size + "\n"
+        self.__header = "    " + "  ".join([str(i + 1).rjust(2) for i in range(board_size)]) + "\n" + self.__separator
+        self.__rows = None
+        self.__dirty = set()
+        self.__text = None
+
+    def invalidate(self, y: int, count: int = 1) -> None:
+        """
+        Mark rows as changed
+        :param y: The first changed row
+        :type y: int
+        :param count: The number of changed rows
+        :type count: int
+        :return: None
+        """
+        if self.__rows is not None:
+            self.__dirty.update(range(y, y + count))
+        self.__text = None
+
+    def invalidate_all(self) -> None:
+        self.__rows = None
+        self.__dirty.clear()
+        self.__text = None
+
+    def render(self, storage) -> str:
+        """
+        Render the board, re-rendering only the dirty rows
+        :param storage: The storage engine of the board
+        :type storage: BoardStorage
+        :return: The board as text
+        :rtype: str
+        """
+        if self.__text is None:
+            if self.__rows is None:
+                self.__rows = [self.__render_row(y, storage.row(y)) for y in range(self.__board_size)]
+            else:
+                for y in self.__dirty:
+                    self.__rows[y] = self.__render_row(y, storage.row(y))
+            self.__dirty.clear()
+            self.__text = self.__header + "".join(self.__rows)
+        return self.__text
+
+    def __render_row(self, y: int, cells: list) -> str:
+        """
+        Render a single row with its left margin and the line below it
+        """
+        parts = [str(y + 1).rjust(2), " |"]
+        for cell in cells:
+            if cell == HIT:
+                parts.append(" . |")
+            elif cell == MISS:
+                parts.append(" X |")
+            elif cell == 0 or not self.__show_ships:
+                parts.append("   |")
+            else:
+                parts.append(f" {cell} |")
+        parts.append("\n")
+        parts.append(self.__separator)
+        return "".join(parts)
@@ -0,0 +1,33 @@
+from enum import Enum
+from typing import NamedTuple, Optional
+
+HIT = -1
+MISS = -2
+
+
+class ShipDirection(Enum):
+    HORIZONTAL = 1
+    VERTICAL = 2
+
+
+class ShotOutcome(Enum):
+    MISS = 1
+    HIT = 2
+    SUNK = 3
+
+
+class ShotResult(NamedTuple):
+    """
+    Everything a shot revealed, so callers never have to query the board again
+    """
+    outcome: ShotOutcome
+    ship_number: Optional[int]
+    game_over: bool
+
+    @property
+    def hit(self) -> bool:
+        return self.outcome != ShotOutcome.MISS
+
+    @property
+    def sunk(self) -> bool:
+        return self.outcome == ShotOutcome.SUNK
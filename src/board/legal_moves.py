@@ -0,0 +1,121 @@
+import random
+
+
+class LegalMoves:
+    """
+    The cells not fired at yet, kept as a permutation of all cells with the legal ones first. Only the positions
+    moved away from the identity are stored (a sparse Fisher-Yates shuffle), so an untouched board costs nothing
+    and removing, restoring, testing and sampling a cell all take O(1).
+    """
+    def __init__(self, cell_count: int):
+        """
+        :param cell_count: The number of cells of the board, cells are numbered y * size + x
+        :type cell_count: int
+        """
+        self.__count = cell_count
+        self.__cells = {}
+        self.__positions = {}
+
+    def copy(self) -> "LegalMoves":
+        legal_moves = LegalMoves.__new__(LegalMoves)
+        legal_moves.__count = self.__count
+        legal_moves.__cells = self.__cells.copy()
+        legal_moves.__positions = self.__positions.copy()
+        return legal_moves
+
+    def __swap(self, position: int, other: int) -> None:
+        cell = self.__cells.get(position, position)
+        other_cell = self.__cells.get(other, other)
+        self.__cells[position] = other_cell
+        self.__cells[other] = cell
+        self.__positions[other_cell] = position
+        self.__positions[cell] = other
+
+    def remove(self, cell: int) -> None:
+        """
+        Mark a cell as fired at, by swapping it behind the last legal cell
+        :param cell: The cell y * size + x
+        :type cell: int
+        :return: None
+        """
+        cells = self.__cells
+        positions = self.__positions
+        position = positions.get(cell, cell)
+        last = self.__count - 1
+        if position > last:
+            raise ValueError("Already hit")
+        # The swap of __swap, inlined as it runs on every shot
+        last_cell = cells.get(last, last)
+        cells[position] = last_cell
+        cells[last] = cell
+        positions[last_cell] = position
+        positions[cell] = last
+        self.__count = last
+
+    def remove_many(self, cells) -> None:
+        """
+        Mark a batch of cells as fired at. The batch is partitioned rather than removed one cell at a time:
+        only the cells that sit among the legal cells left afterwards are swapped, with the legal cells
+        behind them.
+        :param cells: The cells y * size + x
+        :type cells: list
+        :return: None
+        :raises ValueError: If a cell was already fired at or is repeated, the batch is then not applied
+        """
+        cells_at = self.__cells
+        positions = self.__positions
+        removed = set(cells)
+        if len(removed) != len(cells):
+            raise ValueError("Already hit")
+        count = self.__count
+        remaining = count - len(cells)
+        cell_positions = list(map(positions.get, cells, cells))
+        if cell_positions and max(cell_positions) >= count:
+            raise ValueError("Already hit")
+        holes = [position for position in cell_positions if position < remaining]
+        tail = range(remaining, count)
+        fillers = [position for position, cell in zip(tail, map(cells_at.get, tail, tail)) if cell not in removed]
+        for position, other in zip(holes, fillers):
+            cell = cells_at.get(position, position)
+            other_cell = cells_at.get(other, other)
+            cells_at[position] = other_cell
+            cells_at[other] = cell
+            positions[other_cell] = position
+            positions[cell] = other
+        self.__count = remaining
+
+    def restore(self, cell: int) -> None:
+        """
+        Make a fired cell legal again, when a shot is taken back
+        :param cell: The cell y * size + x
+        :type cell: int
+        :return: None
+        """
+        position = self.__positions.get(cell, cell)
+        if position < self.__count:
+            raise ValueError("Not hit")
+        self.__swap(position, self.__count)
+        self.__count += 1
+
+    def sample(self, rng: random.Random = random) -> int or None:
+        """
+        Pick a legal cell uniformly at random
+        :param rng: The random generator to use
+        :type rng: random.Random
+        :return: The cell y * size + x, None if every cell was fired at
+        :rtype: int
+        """
+        if not self.__count:
+            return None
+        position = rng.randrange(self.__count)
+        return self.__cells.get(position, position)
+
+    def __contains__(self, cell: int) -> bool:
+        return self.__positions.get(cell, cell) < self.__count
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __iter__(self):
+        cells = self.__cells
+        return (cells.get(position, position) for position in range(self.__count))
@@ -0,0 +1,144 @@
+import numpy as np
+
+from src.board.board_types import ShipDirection, ShotOutcome, HIT, MISS
+from src.board.ship_registry import ShipRegistry
+from src.board.storage import BoardStorage
+
+
+class NumpyStorage(BoardStorage):
+    """
+    Cells kept in a compact (size, size) int8 array, meant for very large boards.
+    Placements are checked with slices and shots can be resolved in batches.
+    """
+    MAX_SHIP_NUMBER = np.iinfo(np.int8).max
+
+    def __init__(self, board_size: int):
+        super().__init__(board_size)
+        self._cells = np.zeros((board_size, board_size), dtype=np.int8)
+
+    def __slice(self, x: int, y: int, direction: ShipDirection, length: int):
+        if direction == ShipDirection.HORIZONTAL:
+            return self._cells[y, x:x + length]
+        return self._cells[y:y + length, x]
+
+    def cell(self, x: int, y: int) -> int:
+        return int(self._cells[y, x])
+
+    def row(self, y: int) -> list:
+        return self._cells[y].tolist()
+
+    def is_free(self, x: int, y: int, direction: ShipDirection, length: int) -> bool:
+        return not self.__slice(x, y, direction, length).any()
+
+    def place(self, x: int, y: int, direction: ShipDirection, length: int, ship_number: int) -> None:
+        if not 0 < ship_number <= self.MAX_SHIP_NUMBER:
+            raise ValueError(f"Ship number must be between 1 and {self.MAX_SHIP_NUMBER}")
+        self.__slice(x, y, direction, length)[:] = ship_number
+
+    def fire(self, x: int, y: int) -> int:
+        cell = int(self._cells[y, x])
+        if cell == HIT or cell == MISS:
+            raise ValueError("Already hit")
+        self._cells[y, x] = MISS if cell == 0 else HIT
+        return cell
+
+    def unfire(self, x: int, y: int, ship_number: int) -> None:
+        self._cells[y, x] = ship_number
+
+    def fired_cells(self):
+        return iter(np.flatnonzero(self._cells < 0).tolist())
+
+    def copy(self) -> "NumpyStorage":
+        storage = NumpyStorage.__new__(NumpyStorage)
+        storage._board_size = self._board_size
+        storage._cells = self._cells.copy()
+        return storage
+
+    def zobrist_delta(self, xs, ys, outcomes) -> int:
+        """
+        XOR of the Zobrist keys of the shots a batch accepted, the same keys as zobrist.zobrist_key
+        :param xs: The x coordinates of the shots
+        :type xs: array-like
+        :param ys: The y coordinates of the shots
+        :type ys: array-like
+        :param outcomes: The outcomes returned by fire_many
+        :type outcomes: numpy.ndarray
+        :return: The value to XOR into the board hash
+        :rtype: int
+        """
+        accepted = outcomes > 0
+        # Masked before the unsigned cast, as rejected shots may be off the board at negative coordinates
+        xs = np.asarray(xs, dtype=np.intp).ravel()[accepted].astype(np.uint64)
+        ys = np.asarray(ys, dtype=np.intp).ravel()[accepted].astype(np.uint64)
+        hits = (outcomes[accepted] != ShotOutcome.MISS.value).astype(np.uint64)
+        with np.errstate(over="ignore"):
+            z = (ys * np.uint64(self._board_size) + xs) * np.uint64(2) + hits + np.uint64(0x9E3779B97F4A7C15)
+            z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            z = z ^ (z >> np.uint64(31))
+        return int(np.bitwise_xor.reduce(z)) if len(z) else 0
+
+    def accepted_cells(self, xs, ys, outcomes: np.ndarray) -> list:
+        """
+        Get the cells a batch of shots fired at, each at most once as fire_many accepts no repeats
+        :param xs: The x coordinates of the shots
+        :type xs: array-like
+        :param ys: The y coordinates of the shots
+        :type ys: array-like
+        :param outcomes: The outcomes returned by fire_many
+        :type outcomes: numpy.ndarray
+        :return: The cells y * size + x of the accepted shots, in shot order
+        :rtype: list
+        """
+        accepted = np.flatnonzero(outcomes)
+        xs = np.asarray(xs, dtype=np.intp).ravel()[accepted]
+        ys = np.asarray(ys, dtype=np.intp).ravel()[accepted]
+        return (ys * self._board_size + xs).tolist()
+
+    def fire_many(self, xs, ys, ships: ShipRegistry) -> tuple:
+        """
+        Fire a whole batch of shots in one vectorized pass
+        :param xs: The x coordinates of the shots
+        :type xs: array-like
+        :param ys: The y coordinates of the shots
+        :type ys: array-like
+        :param ships: The registry of the board, updated with the hits
+        :type ships: ShipRegistry
+        :return: Two arrays aligned with the shots: the ShotOutcome value of each shot (0 for shots off the
+            board or at cells already fired at, including repeats inside the batch) and the number of the
+            ship each shot sunk (0 if it sunk nothing)
+        :rtype: tuple
+        """
+        size = self._board_size
+        xs = np.asarray(xs, dtype=np.intp).ravel()
+        ys = np.asarray(ys, dtype=np.intp).ravel()
+        if xs.shape != ys.shape:
+            raise ValueError("Coordinate arrays differ in length")
+        outcomes = np.zeros(len(xs), dtype=np.int8)
+        sunk = np.zeros(len(xs), dtype=np.int8)
+
+        # Keep the first shot at every cell on the board, in shot order
+        shots = np.flatnonzero((xs >= 0) & (xs < size) & (ys >= 0) & (ys < size))
+        _, first = np.unique(ys[shots] * size + xs[shots], return_index=True)
+        shots = shots[np.sort(first)]
+        values = self._cells[ys[shots], xs[shots]]
+        fresh = values >= 0
+        shots = shots[fresh]
+        values = values[fresh]
+
+        hits = values > 0
+        self._cells[ys[shots], xs[shots]] = np.where(hits, HIT, MISS)
+        outcomes[shots] = np.where(hits, ShotOutcome.HIT.value, ShotOutcome.MISS.value)
+
+        hit_shots = shots[hits]
+        hit_ships = values[hits]
+        if len(hit_shots):
+            # Only the last shot of the batch on a ship can sink it
+            ship_numbers, counts = np.unique(hit_ships, return_counts=True)
+            _, last = np.unique(hit_ships[::-1], return_index=True)
+            last = hit_shots[len(hit_shots) - 1 - last]
+            for ship_number, count, shot in zip(ship_numbers.tolist(), counts.tolist(), last.tolist()):
+                if ships.hit(ship_number, count):
+                    outcomes[shot] = ShotOutcome.SUNK.value
+                    sunk[shot] = ship_number
+        return outcomes, sunk
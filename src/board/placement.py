@@ -0,0 +1,200 @@
+import random
+from bisect import bisect_right
+from functools import lru_cache
+
+from src.board.board_types import ShipDirection
+
+
+@lru_cache(maxsize=1 << 16)
+def line_counts(line_length: int, blocked: int, ship_length: int) -> tuple:
+    """
+    Count the placements of a ship covering every cell of a line. Rows and columns repeat the same
+    patterns, within a game and across games, so the counts are memoized; line_counts.cache_info()
+    reports the hits and misses.
+    :param line_length: The number of cells of the line
+    :type line_length: int
+    :param blocked: Bitmask of the cells no ship may cover, bit i for the cell i
+    :type blocked: int
+    :param ship_length: The length of the ship
+    :type ship_length: int
+    :return: The number of placements covering each cell
+    :rtype: tuple
+    """
+    changes = [0] * (line_length + 1)
+    ship = (1 << ship_length) - 1
+    for start in range(line_length - ship_length + 1):
+        if not blocked >> start & ship:
+            changes[start] += 1
+            changes[start + ship_length] -= 1
+    counts = []
+    running = 0
+    for change in changes[:line_length]:
+        running += change
+        counts.append(running)
+    return tuple(counts)
+
+
+class PlacementEngine:
+    """
+    Keeps the free runs (start, length) of every row and column of a board, so the legal placements
+    of a ship can be counted and sampled uniformly without trial and error.
+    """
+    def __init__(self, board_size: int, blocked=()):
+        """
+        :param board_size: The size of the board
+        :type board_size: int
+        :param blocked: Cells (x, y) no ship may cover
+        :type blocked: iterable
+        """
+        self.__board_size = board_size
+        self.__rows = [[(0, board_size)] for _ in range(board_size)]
+        self.__columns = [[(0, board_size)] for _ in range(board_size)]
+        for x, y in blocked:
+            self.__split(self.__rows[y], x, 1)
+            self.__split(self.__columns[x], y, 1)
+
+    def copy(self) -> "PlacementEngine":
+        engine = PlacementEngine.__new__(PlacementEngine)
+        engine.__board_size = self.__board_size
+        engine.__rows = [runs.copy() for runs in self.__rows]
+        engine.__columns = [runs.copy() for runs in self.__columns]
+        return engine
+
+    @staticmethod
+    def __split(runs: list, start: int, length: int) -> None:
+        """
+        Remove the cells start..start + length - 1 from the free run containing them
+        """
+        index = bisect_right(runs, (start, float("inf"))) - 1
+        if index < 0:
+            return
+        run_start, run_length = runs[index]
+        if start + length > run_start + run_length:
+            return
+        pieces = []
+        if start > run_start:
+            pieces.append((run_start, start - run_start))
+        if run_start + run_length > start + length:
+            pieces.append((start + length, run_start + run_length - start - length))
+        runs[index:index + 1] = pieces
+
+    @staticmethod
+    def __line_count(runs: list, length: int) -> int:
+        return sum(run_length - length + 1 for _, run_length in runs if run_length >= length)
+
+    def __lines(self, length: int):
+        """
+        Iterate over (direction, line index, runs); ships of length 1 are only placed horizontally
+        so every cell is counted once
+        """
+        for y, runs in enumerate(self.__rows):
+            yield ShipDirection.HORIZONTAL, y, runs
+        if length > 1:
+            for x, runs in enumerate(self.__columns):
+                yield ShipDirection.VERTICAL, x, runs
+
+    def count(self, length: int) -> int:
+        """
+        Count the legal placements of a ship
+        :param length: The length of the ship
+        :type length: int
+        :return: The number of legal placements
+        :rtype: int
+        """
+        return sum(self.__line_count(runs, length) for _, _, runs in self.__lines(length))
+
+    def sample(self, length: int, rng: random.Random = random) -> tuple or None:
+        """
+        Pick one of the legal placements of a ship uniformly at random
+        :param length: The length of the ship
+        :type length: int
+        :param rng: The random generator to use
+        :type rng: random.Random
+        :return: The x coordinate, y coordinate and direction, None if the ship does not fit anywhere
+        :rtype: tuple
+        """
+        counts = [(direction, line, runs, self.__line_count(runs, length))
+                  for direction, line, runs in self.__lines(length)]
+        total = sum(count for _, _, _, count in counts)
+        if total == 0:
+            return None
+        pick = rng.randrange(total)
+        for direction, line, runs, count in counts:
+            if pick >= count:
+                pick -= count
+                continue
+            for run_start, run_length in runs:
+                if run_length < length:
+                    continue
+                if pick > run_length - length:
+                    pick -= run_length - length + 1
+                    continue
+                if direction == ShipDirection.HORIZONTAL:
+                    return run_start + pick, line, direction
+                return line, run_start + pick, direction
+
+    def occupy(self, x: int, y: int, direction: ShipDirection, length: int) -> None:
+        """
+        Remove the cells of a placed ship from the index
+        :param x: The x coordinate of the ship
+        :type x: int
+        :param y: The y coordinate of the ship
+        :type y: int
+        :param direction: The direction of the ship
+        :type direction: ShipDirection
+        :param length: The length of the ship
+        :type length: int
+        :return: None
+        """
+        if direction == ShipDirection.HORIZONTAL:
+            self.__split(self.__rows[y], x, length)
+            for i in range(length):
+                self.__split(self.__columns[x + i], y, 1)
+        else:
+            self.__split(self.__columns[x], y, length)
+            for i in range(length):
+                self.__split(self.__rows[y + i], x, 1)
+
+    def check_fleet(self, lengths: list) -> None:
+        """
+        Reject fleets that can never fit on the board
+        :param lengths: The lengths of the ships
+        :type lengths: list
+        :return: None
+        :raises ValueError: If a ship is longer than the board or the fleet has more cells than the board
+        """
+        if any(length < 1 for length in lengths):
+            raise ValueError("Ship lengths must be positive")
+        if any(length > self.__board_size for length in lengths):
+            raise ValueError(f"A ship is longer than the board size {self.__board_size}")
+        if sum(lengths) > self.__board_size * self.__board_size:
+            raise ValueError(f"The fleet needs {sum(lengths)} cells but the board only has {self.__board_size ** 2}")
+
+    def layout(self, lengths: list, rng: random.Random = random, max_restarts: int = 100) -> list:
+        """
+        Generate a random layout of a fleet, placing the longest ships first
+        :param lengths: The lengths of the ships
+        :type lengths: list
+        :param rng: The random generator to use
+        :type rng: random.Random
+        :param max_restarts: How many times to start over when the ships placed so far leave no room for the next one
+        :type max_restarts: int
+        :return: A list of (x, y, direction, length) placements
+        :rtype: list
+        :raises ValueError: If the fleet cannot be placed
+        """
+        self.check_fleet(lengths)
+        order = sorted(lengths, reverse=True)
+        for _ in range(max_restarts + 1):
+            engine = self.copy()
+            placements = []
+            for length in order:
+                placement = engine.sample(length, rng)
+                if placement is None:
+                    break
+                x, y, direction = placement
+                engine.occupy(x, y, direction, length)
+                placements.append((x, y, direction, length))
+            else:
+                return placements
+        raise ValueError(f"Could not fit ships of lengths {order} on the board after {max_restarts} restarts")
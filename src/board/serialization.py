@@ -0,0 +1,185 @@
+import mmap
+import struct
+
+from src.board.board import Board, PlayerBoard, ComputerBoard
+from src.board.board_types import ShipDirection
+
+# Bump FORMAT_VERSION whenever the layout changes and keep a decoder for every older version
+FORMAT_VERSION = 1
+BOARD_MAGIC = b"BSB"
+
+BOARD_KINDS = [Board, PlayerBoard, ComputerBoard]
+
+_HEADER = struct.Struct("<3sBBIB")
+_SHIP = struct.Struct("<IIIIB")
+_COUNT = struct.Struct("<I")
+_RECORD_LENGTH = struct.Struct("<I")
+
+FIRED_BITMAP = 0
+FIRED_LIST = 1
+
+
+def encode_board(board: Board, fleet: list = None) -> bytes:
+    """
+    Encode a board into the compact binary format
+    :param board: The board to encode
+    :type board: Board
+    :param fleet: The ship lengths of the fleet, defaults to the lengths of the ships on the board
+    :type fleet: list
+    :return: The encoded board
+    :rtype: bytes
+    """
+    size = board.get_size
+    storage = board._storage_name.encode()
+    placements = board._ships.placements()
+    if fleet is None:
+        fleet = [length for _, _, _, _, length in placements]
+
+    parts = [_HEADER.pack(BOARD_MAGIC, FORMAT_VERSION, BOARD_KINDS.index(type(board)), size, len(storage)), storage]
+    parts.append(_COUNT.pack(len(placements)))
+    for ship_number, x, y, direction, length in placements:
+        parts.append(_SHIP.pack(ship_number, x, y, length, direction == ShipDirection.HORIZONTAL))
+    parts.append(_COUNT.pack(len(fleet)))
+    parts.append(struct.pack(f"<{len(fleet)}I", *fleet))
+
+    # Fired cells go either as a bitmap of the whole board or as a list of cells, whichever is smaller
+    fired = list(board._storage.fired_cells())
+    bitmap_size = (size * size + 7) // 8
+    if len(fired) * 4 < bitmap_size:
+        parts.append(struct.pack(f"<BI{len(fired)}I", FIRED_LIST, len(fired), *fired))
+    else:
+        bitmap = 0
+        for index in fired:
+            bitmap |= 1 << index
+        parts.append(struct.pack("<B", FIRED_BITMAP))
+        parts.append(bitmap.to_bytes(bitmap_size, "little"))
+    return b"".join(parts)
+
+
+def decode_board(data, storage: str = None) -> tuple:
+    """
+    Decode a board from the compact binary format
+    :param data: The encoded board
+    :type data: bytes or memoryview
+    :param storage: The storage engine of the decoded board, defaults to the one it was saved with
+    :type storage: str
+    :return: The board and the ship lengths of its fleet
+    :rtype: tuple
+    """
+    data = memoryview(data)
+    magic, version, kind, size, storage_length = _HEADER.unpack_from(data, 0)
+    if magic != BOARD_MAGIC:
+        raise ValueError("Not a board record")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported board format version {version}")
+    offset = _HEADER.size
+    saved_storage = bytes(data[offset:offset + storage_length]).decode()
+    offset += storage_length
+    board = BOARD_KINDS[kind](size, storage or saved_storage)
+
+    ship_count, = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    for _ in range(ship_count):
+        ship_number, x, y, length, horizontal = _SHIP.unpack_from(data, offset)
+        offset += _SHIP.size
+        direction = ShipDirection.HORIZONTAL if horizontal else ShipDirection.VERTICAL
+        Board.place_battleships(board, length, x, y, direction, ship_number)
+
+    fleet_size, = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    fleet = list(struct.unpack_from(f"<{fleet_size}I", data, offset))
+    offset += 4 * fleet_size
+
+    encoding = data[offset]
+    offset += 1
+    if encoding == FIRED_LIST:
+        count, = _COUNT.unpack_from(data, offset)
+        fired = struct.unpack_from(f"<{count}I", data, offset + _COUNT.size)
+    else:
+        bitmap = int.from_bytes(data[offset:offset + (size * size + 7) // 8], "little")
+        fired = []
+        while bitmap:
+            low = bitmap & -bitmap
+            fired.append(low.bit_length() - 1)
+            bitmap ^= low
+    for index in fired:
+        board.check_hit(index % size, index // size)
+    return board, fleet
+
+
+class RecordWriter:
+    """
+    Appends length-prefixed records to a file
+    """
+    def __init__(self, path: str):
+        self.__file = open(path, "ab")
+
+    def write(self, record: bytes) -> None:
+        self.__file.write(_RECORD_LENGTH.pack(len(record)))
+        self.__file.write(record)
+
+    def close(self) -> None:
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class RecordReader:
+    """
+    Memory-maps a file of length-prefixed records. Only the length prefixes are read to find a
+    record, which is returned as a memoryview into the mapping without parsing the others.
+    """
+    def __init__(self, path: str):
+        self.__file = open(path, "rb")
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ) if self.__file.seek(0, 2) else b""
+        self.__view = memoryview(self.__map)
+        self.__offsets = []
+        self.__scanned = 0
+
+    def __scan_to(self, index: int) -> bool:
+        """
+        Walk the length prefixes until the offset of a record is known
+        """
+        while len(self.__offsets) <= index:
+            if self.__scanned + _RECORD_LENGTH.size > len(self.__view):
+                return False
+            length, = _RECORD_LENGTH.unpack_from(self.__view, self.__scanned)
+            # A record cut short by a crash while it was appended ends the file
+            if self.__scanned + _RECORD_LENGTH.size + length > len(self.__view):
+                return False
+            self.__offsets.append((self.__scanned + _RECORD_LENGTH.size, length))
+            self.__scanned += _RECORD_LENGTH.size + length
+        return True
+
+    def __getitem__(self, index: int) -> memoryview:
+        if index < 0 or not self.__scan_to(index):
+            raise IndexError("Record index out of range")
+        start, length = self.__offsets[index]
+        return self.__view[start:start + length]
+
+    def __len__(self) -> int:
+        while self.__scan_to(len(self.__offsets)):
+            pass
+        return len(self.__offsets)
+
+    def __iter__(self):
+        index = 0
+        while self.__scan_to(index):
+            yield self[index]
+            index += 1
+
+    def close(self) -> None:
+        self.__view.release()
+        if self.__map:
+            self.__map.close()
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,88 @@
+class ShipRegistry:
+    """
+    Keeps, for every ship on a board, how many of its cells are still afloat.
+    The storage engine maps a cell to its ship number, so a hit is resolved with
+    a dictionary lookup no matter how many ships there are.
+    """
+    def __init__(self):
+        self.__remaining = {}
+        self.__placements = {}
+        self.__afloat = 0
+
+    def add(self, ship_number: int, x: int, y: int, direction, length: int) -> None:
+        """
+        Register a newly placed ship
+        :param ship_number: The number of the ship
+        :type ship_number: int
+        :param x: The x coordinate of the ship
+        :type x: int
+        :param y: The y coordinate of the ship
+        :type y: int
+        :param direction: The direction of the ship
+        :type direction: ShipDirection
+        :param length: The length of the ship
+        :type length: int
+        :return: None
+        """
+        if ship_number in self.__remaining:
+            raise ValueError("Ship number already used")
+        self.__remaining[ship_number] = length
+        self.__placements[ship_number] = (x, y, direction, length)
+        self.__afloat += 1
+
+    def hit(self, ship_number: int, count: int = 1) -> bool:
+        """
+        Record hits on a ship
+        :param ship_number: The number of the ship that was hit
+        :type ship_number: int
+        :param count: The number of new cells of the ship that were hit
+        :type count: int
+        :return: True if these hits sunk the ship
+        :rtype: bool
+        """
+        remaining = self.__remaining[ship_number] - count
+        self.__remaining[ship_number] = remaining
+        if remaining == 0:
+            self.__afloat -= 1
+            return True
+        return False
+
+    def unhit(self, ship_number: int) -> None:
+        """
+        Take back a hit on a ship
+        :param ship_number: The number of the ship
+        :type ship_number: int
+        :return: None
+        """
+        remaining = self.__remaining[ship_number] + 1
+        self.__remaining[ship_number] = remaining
+        if remaining == 1:
+            self.__afloat += 1
+
+    def copy(self) -> "ShipRegistry":
+        registry = ShipRegistry()
+        registry.__remaining = self.__remaining.copy()
+        registry.__placements = self.__placements.copy()
+        registry.__afloat = self.__afloat
+        return registry
+
+    def is_sunk(self, ship_number: int) -> bool:
+        return self.__remaining.get(ship_number) == 0
+
+    def length(self, ship_number: int) -> int:
+        return self.__placements[ship_number][3]
+
+    def placements(self) -> list:
+        """
+        Get the placed ships
+        :return: A list of (ship number, x, y, direction, length), in placement order
+        :rtype: list
+        """
+        return [(ship_number, *placement) for ship_number, placement in self.__placements.items()]
+
+    @property
+    def afloat(self) -> int:
+        return self.__afloat
+
+    def __len__(self) -> int:
+        return len(self.__remaining)
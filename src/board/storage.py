@@ -0,0 +1,286 @@
+import importlib
+from abc import ABC, abstractmethod
+
+from src.board.board_types import ShipDirection, HIT, MISS
+
+
+class BoardStorage(ABC):
+    """
+    Storage engine behind a Board. Coordinates are already validated by the board,
+    x is the column and y is the row.
+    """
+    def __init__(self, board_size: int):
+        self._board_size = board_size
+
+    @abstractmethod
+    def cell(self, x: int, y: int) -> int:
+        """
+        Get the value of a cell: 0 for water, a ship number, Board.HIT or Board.MISS
+        """
+        pass
+
+    @abstractmethod
+    def row(self, y: int) -> list:
+        """
+        Get the values of a whole row, used for rendering
+        """
+        pass
+
+    @abstractmethod
+    def is_free(self, x: int, y: int, direction: ShipDirection, length: int) -> bool:
+        """
+        Check that no ship occupies the cells of a placement
+        """
+        pass
+
+    @abstractmethod
+    def place(self, x: int, y: int, direction: ShipDirection, length: int, ship_number: int) -> None:
+        pass
+
+    @abstractmethod
+    def fire(self, x: int, y: int) -> int:
+        """
+        Fire at a cell
+        :return: The number of the ship that was hit, 0 on a miss
+        :rtype: int
+        :raises ValueError: If the cell was already fired at
+        """
+        pass
+
+    @abstractmethod
+    def unfire(self, x: int, y: int, ship_number: int) -> None:
+        """
+        Take back a shot
+        :param ship_number: What fire returned for the shot
+        """
+        pass
+
+    @abstractmethod
+    def copy(self) -> "BoardStorage":
+        pass
+
+    @abstractmethod
+    def fired_cells(self):
+        """
+        Iterate over the cells fired at, as y * size + x
+        """
+        pass
+
+
+class GridStorage(BoardStorage):
+    """
+    The original representation: a list of lists holding the cell values.
+    """
+    def __init__(self, board_size: int):
+        super().__init__(board_size)
+        self._board = [[0 for _ in range(board_size)] for _ in range(board_size)]
+
+    def cell(self, x: int, y: int) -> int:
+        return self._board[y][x]
+
+    def row(self, y: int) -> list:
+        return self._board[y]
+
+    def is_free(self, x: int, y: int, direction: ShipDirection, length: int) -> bool:
+        if direction == ShipDirection.HORIZONTAL:
+            row = self._board[y]
+            for i in range(length):
+                if row[x + i] != 0:
+                    return False
+        else:
+            for i in range(length):
+                if self._board[y + i][x] != 0:
+                    return False
+        return True
+
+    def place(self, x: int, y: int, direction: ShipDirection, length: int, ship_number: int) -> None:
+        if direction == ShipDirection.HORIZONTAL:
+            for i in range(length):
+                self._board[y][x + i] = ship_number
+        else:
+            for i in range(length):
+                self._board[y + i][x] = ship_number
+
+    def fire(self, x: int, y: int) -> int:
+        cell = self._board[y][x]
+        if cell == HIT or cell == MISS:
+            raise ValueError("Already hit")
+        if cell == 0:
+            self._board[y][x] = MISS
+            return 0
+        self._board[y][x] = HIT
+        return cell
+
+    def unfire(self, x: int, y: int, ship_number: int) -> None:
+        self._board[y][x] = ship_number
+
+    def fired_cells(self):
+        for y, row in enumerate(self._board):
+            for x, cell in enumerate(row):
+                if cell == HIT or cell == MISS:
+                    yield y * self._board_size + x
+
+    def copy(self) -> "GridStorage":
+        storage = GridStorage.__new__(GridStorage)
+        storage._board_size = self._board_size
+        storage._board = [row.copy() for row in self._board]
+        return storage
+
+
+class BitboardStorage(BoardStorage):
+    """
+    Ships and fired cells kept as integer bitmasks, one bit per cell (bit y * size + x).
+    Overlap checks are a single mask operation.
+    """
+    __vertical_units = {}
+
+    def __init__(self, board_size: int):
+        super().__init__(board_size)
+        self.__ships = 0
+        self.__fired = 0
+        self.__owners = {}
+
+    def __mask(self, x: int, y: int, direction: ShipDirection, length: int) -> int:
+        """
+        Build the bitmask covering a placement
+        """
+        if direction == ShipDirection.HORIZONTAL:
+            unit = (1 << length) - 1
+        else:
+            key = (self._board_size, length)
+            unit = self.__vertical_units.get(key)
+            if unit is None:
+                unit = 0
+                for i in range(length):
+                    unit |= 1 << (i * self._board_size)
+                self.__vertical_units[key] = unit
+        return unit << (y * self._board_size + x)
+
+    def cell(self, x: int, y: int) -> int:
+        index = y * self._board_size + x
+        bit = 1 << index
+        if self.__fired & bit:
+            return HIT if self.__ships & bit else MISS
+        return self.__owners.get(index, 0)
+
+    def row(self, y: int) -> list:
+        return [self.cell(x, y) for x in range(self._board_size)]
+
+    def is_free(self, x: int, y: int, direction: ShipDirection, length: int) -> bool:
+        return not self.__ships & self.__mask(x, y, direction, length)
+
+    def place(self, x: int, y: int, direction: ShipDirection, length: int, ship_number: int) -> None:
+        mask = self.__mask(x, y, direction, length)
+        self.__ships |= mask
+        step = 1 if direction == ShipDirection.HORIZONTAL else self._board_size
+        start = y * self._board_size + x
+        for i in range(length):
+            self.__owners[start + i * step] = ship_number
+
+    def fire(self, x: int, y: int) -> int:
+        index = y * self._board_size + x
+        bit = 1 << index
+        if self.__fired & bit:
+            raise ValueError("Already hit")
+        self.__fired |= bit
+        if self.__ships & bit:
+            return self.__owners[index]
+        return 0
+
+    def unfire(self, x: int, y: int, ship_number: int) -> None:
+        self.__fired &= ~(1 << (y * self._board_size + x))
+
+    def fired_cells(self):
+        fired = self.__fired
+        while fired:
+            low = fired & -fired
+            yield low.bit_length() - 1
+            fired ^= low
+
+    def copy(self) -> "BitboardStorage":
+        storage = BitboardStorage(self._board_size)
+        storage.__ships = self.__ships
+        storage.__fired = self.__fired
+        storage.__owners = self.__owners.copy()
+        return storage
+
+
+class SparseStorage(BoardStorage):
+    """
+    Only ship cells and fired cells are stored, in hashed containers keyed by y * size + x.
+    Memory grows with the ships and shots instead of the board area.
+    """
+    def __init__(self, board_size: int):
+        super().__init__(board_size)
+        self.__ships = {}
+        self.__fired = set()
+
+    def __cells(self, x: int, y: int, direction: ShipDirection, length: int) -> range:
+        start = y * self._board_size + x
+        step = 1 if direction == ShipDirection.HORIZONTAL else self._board_size
+        return range(start, start + length * step, step)
+
+    def cell(self, x: int, y: int) -> int:
+        index = y * self._board_size + x
+        if index in self.__fired:
+            return HIT if index in self.__ships else MISS
+        return self.__ships.get(index, 0)
+
+    def row(self, y: int) -> list:
+        return [self.cell(x, y) for x in range(self._board_size)]
+
+    def is_free(self, x: int, y: int, direction: ShipDirection, length: int) -> bool:
+        return not any(index in self.__ships for index in self.__cells(x, y, direction, length))
+
+    def place(self, x: int, y: int, direction: ShipDirection, length: int, ship_number: int) -> None:
+        for index in self.__cells(x, y, direction, length):
+            self.__ships[index] = ship_number
+
+    def fire(self, x: int, y: int) -> int:
+        index = y * self._board_size + x
+        if index in self.__fired:
+            raise ValueError("Already hit")
+        self.__fired.add(index)
+        return self.__ships.get(index, 0)
+
+    def unfire(self, x: int, y: int, ship_number: int) -> None:
+        self.__fired.discard(y * self._board_size + x)
+
+    def fired_cells(self):
+        return iter(self.__fired)
+
+    def copy(self) -> "SparseStorage":
+        storage = SparseStorage(self._board_size)
+        storage.__ships = self.__ships.copy()
+        storage.__fired = self.__fired.copy()
+        return storage
+
+
+STORAGE_ENGINES = {
+    "grid": GridStorage,
+    "bitboard": BitboardStorage,
+    "sparse": SparseStorage,
+}
+
+# Engines with optional dependencies, imported only when requested
+OPTIONAL_STORAGE_ENGINES = {
+    "numpy": ("src.board.numpy_storage", "NumpyStorage"),
+}
+
+
+def create_storage(storage: str, board_size: int) -> BoardStorage:
+    """
+    Create a storage engine by name
+    :param storage: The name of the engine, one of STORAGE_ENGINES or OPTIONAL_STORAGE_ENGINES
+    :type storage: str
+    :param board_size: The size of the board
+    :type board_size: int
+    :return: The storage engine
+    :rtype: BoardStorage
+    """
+    if storage in STORAGE_ENGINES:
+        return STORAGE_ENGINES[storage](board_size)
+    if storage in OPTIONAL_STORAGE_ENGINES:
+        module_name, class_name = OPTIONAL_STORAGE_ENGINES[storage]
+        return getattr(importlib.import_module(module_name), class_name)(board_size)
+    raise ValueError(f"Unknown board storage: {storage}")
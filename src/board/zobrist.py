@@ -0,0 +1,18 @@
+MASK_64 = (1 << 64) - 1
+
+
+def zobrist_key(index: int, hit: bool) -> int:
+    """
+    Get the Zobrist key of a fired cell. Keys come from a splitmix64 hash of the cell and its state,
+    so no random table of board size has to be kept in memory.
+    :param index: The cell, y * size + x
+    :type index: int
+    :param hit: True if the shot was a hit, False if it was a miss
+    :type hit: bool
+    :return: A 64 bit key
+    :rtype: int
+    """
+    z = (index * 2 + hit + 0x9E3779B97F4A7C15) & MASK_64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return z ^ (z >> 31)
@@ -0,0 +1,180 @@
+import unittest
+
+from src.board.board import Board, PlayerBoard, ComputerBoard, ShipDirection
+from src.board.board_types import ShotOutcome, ShotResult
+from src.board.legal_moves import LegalMoves
+from src.board.placement import PlacementEngine, line_counts
+from src.board.storage import STORAGE_ENGINES
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+STORAGES = list(STORAGE_ENGINES) + (["numpy"] if numpy is not None else [])
+
+
+class TestBoard(unittest.TestCase):
+
+    def test_place_and_sink(self):
+        for storage in STORAGES:
+            with self.subTest(storage=storage):
+                board = ComputerBoard(6, storage)
+                board.place_battleships(3, 1, 2, ShipDirection.HORIZONTAL, 1)
+                board.place_battleships(2, 0, 0, ShipDirection.VERTICAL, 2)
+                self.assertEqual(board.get_cell(2, 1), 1)
+                self.assertEqual(board.get_cell(1, 0), 2)
+                self.assertEqual(board.check_hit(5, 5), ShotResult(ShotOutcome.MISS, None, False))
+                self.assertEqual(board.check_hit(0, 0), ShotResult(ShotOutcome.HIT, 2, False))
+                self.assertFalse(board.check_ship_sunk(2))
+                result = board.check_hit(0, 1)
+                self.assertTrue(result.sunk)
+                self.assertTrue(board.check_ship_sunk(2))
+                self.assertFalse(result.game_over)
+                for x in range(1, 4):
+                    result = board.check_hit(x, 2)
+                self.assertTrue(result.game_over)
+                self.assertTrue(board.check_game_over())
+                self.assertEqual(board.get_cell(0, 0), Board.HIT)
+                self.assertEqual(board.get_cell(5, 5), Board.MISS)
+                with self.assertRaises(ValueError):
+                    board.check_hit(0, 0)
+
+    def test_overlap(self):
+        for storage in STORAGES:
+            with self.subTest(storage=storage):
+                board = PlayerBoard(6, storage)
+                board.place_battleships(3, 0, 1, "h", 1)
+                with self.assertRaises(ValueError):
+                    board.place_battleships(3, 1, 0, "v", 2)
+                with self.assertRaises(ValueError):
+                    board.place_battleships(3, 4, 0, "h", 2)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_fire_many(self):
+        board = ComputerBoard(8, "numpy")
+        board.place_battleships(2, 0, 0, ShipDirection.HORIZONTAL, 1)
+        board.place_battleships(3, 7, 5, ShipDirection.VERTICAL, 2)
+        outcomes, sunk = board.fire_many([0, 4, 1, 0, 7, 9, 7], [0, 4, 0, 0, 5, 0, 6])
+        self.assertEqual(outcomes.tolist(), [ShotOutcome.HIT.value, ShotOutcome.MISS.value, ShotOutcome.SUNK.value,
+                                             0, ShotOutcome.HIT.value, 0, ShotOutcome.HIT.value])
+        self.assertEqual(sunk.tolist(), [0, 0, 1, 0, 0, 0, 0])
+        self.assertFalse(board.check_game_over())
+        outcomes, sunk = board.fire_many([7], [7])
+        self.assertEqual(sunk.tolist(), [2])
+        self.assertTrue(board.check_game_over())
+        self.assertEqual(len(board.get_legal_moves), 64 - 6)
+        self.assertFalse(board.is_legal_move(7, 7))
+
+        # Batches of any shape are flattened
+        board = ComputerBoard(8, "numpy")
+        board.place_battleships(2, 0, 0, ShipDirection.HORIZONTAL, 1)
+        outcomes, _ = board.fire_many(numpy.array([[0, 1], [5, 5]]), numpy.array([[0, 0], [3, 3]]))
+        self.assertEqual(outcomes.tolist(), [ShotOutcome.HIT.value, ShotOutcome.SUNK.value, ShotOutcome.MISS.value, 0])
+        self.assertEqual(sorted(set(range(64)) - set(board.get_legal_moves)), [0, 1, 29])
+
+        # Shots off the board are rejected without disturbing the rest of the batch
+        board = ComputerBoard(10, "numpy")
+        board.place_battleships(3, 0, 0, ShipDirection.HORIZONTAL, 1)
+        outcomes, sunk = board.fire_many([0, 1, -1, 2, 10], [0, 0, 0, 0, 3])
+        self.assertEqual(outcomes.tolist(), [ShotOutcome.HIT.value, ShotOutcome.HIT.value, 0, ShotOutcome.SUNK.value, 0])
+        self.assertEqual(sunk.tolist(), [0, 0, 0, 1, 0])
+        self.assertEqual(len(board.get_legal_moves), 97)
+        self.assertFalse(board.is_legal_move(0, 0))
+        expected = ComputerBoard(10)
+        expected.place_battleships(3, 0, 0, ShipDirection.HORIZONTAL, 1)
+        for x in range(3):
+            expected.check_hit(x, 0)
+        self.assertEqual(board.zobrist_hash, expected.zobrist_hash)
+
+    def test_undo_and_snapshot(self):
+        for storage in STORAGES:
+            with self.subTest(storage=storage):
+                board = ComputerBoard(6, storage)
+                board.place_battleships(2, 0, 0, ShipDirection.HORIZONTAL, 1)
+                empty_hash = board.zobrist_hash
+                board.push_shot(0, 0)
+                snapshot = board.snapshot()
+                self.assertTrue(board.push_shot(1, 0).game_over)
+                self.assertFalse(snapshot.check_game_over())
+                self.assertEqual(snapshot.get_cell(0, 1), 1)
+                board.pop_shot()
+                self.assertEqual(board.zobrist_hash, snapshot.zobrist_hash)
+                board.pop_shot()
+                self.assertEqual(board.zobrist_hash, empty_hash)
+                self.assertEqual(board.get_cell(0, 0), 1)
+                self.assertEqual(snapshot.get_cell(0, 0), Board.HIT)
+
+    def test_legal_moves(self):
+        board = ComputerBoard(4)
+        board.place_battleships(2, 0, 0, ShipDirection.HORIZONTAL, 1)
+        board.check_hit(1, 0)
+        board.push_shot(3, 3)
+        snapshot = board.snapshot()
+        self.assertFalse(board.is_legal_move(1, 0))
+        self.assertFalse(board.is_legal_move(4, 0))
+        self.assertEqual(len(board.get_legal_moves), 14)
+        board.pop_shot()
+        self.assertTrue(board.is_legal_move(3, 3))
+        self.assertFalse(snapshot.is_legal_move(3, 3))
+        with self.assertRaises(ValueError):
+            board.check_hit(1, 0)
+        while len(board.get_legal_moves):
+            board.check_hit(*board.random_legal_move())
+        self.assertIsNone(board.random_legal_move())
+        self.assertEqual(len(board.fired_cells()), 16)
+        self.assertEqual(sorted(snapshot.get_legal_moves), [cell for cell in range(15) if cell != 1])
+
+        legal_moves = LegalMoves(16)
+        legal_moves.remove_many([3, 12, 5])
+        legal_moves.remove_many([15, 0, 9, 7])
+        self.assertEqual(sorted(legal_moves), [1, 2, 4, 6, 8, 10, 11, 13, 14])
+        with self.assertRaises(ValueError):
+            legal_moves.remove_many([1, 9])
+        with self.assertRaises(ValueError):
+            legal_moves.remove_many([1, 1])
+        self.assertEqual(len(legal_moves), 9)
+        self.assertTrue(all(legal_moves.sample() in legal_moves for _ in range(100)))
+
+    def test_render_cache(self):
+        for storage in STORAGES:
+            for board_type in (PlayerBoard, ComputerBoard):
+                with self.subTest(storage=storage, board=board_type.__name__):
+                    board = board_type(6, storage)
+                    self.assertEqual(str(board), str(board.snapshot()))
+                    board.place_battleships(2, 0, 0, "h" if board_type is PlayerBoard else ShipDirection.HORIZONTAL, 1)
+                    board.place_battleships(3, 5, 2, "v" if board_type is PlayerBoard else ShipDirection.VERTICAL, 2)
+                    # A snapshot renders from scratch, the board only re-renders its dirty rows
+                    self.assertEqual(str(board), str(board.snapshot()))
+                    for x, y in ((3, 3), (0, 0), (5, 3), (1, 0), (2, 5), (5, 4)):
+                        board.push_shot(x, y)
+                        self.assertEqual(str(board), str(board.snapshot()))
+                    board.pop_shot()
+                    board.pop_shot()
+                    self.assertEqual(str(board), str(board.snapshot()))
+                    board.check_hit(5, 2)
+                    self.assertEqual(str(board), str(board.snapshot()))
+
+    def test_line_counts(self):
+        self.assertEqual(line_counts(6, 0, 3), (1, 2, 3, 3, 2, 1))
+        self.assertEqual(line_counts(6, 0b000100, 2), (1, 1, 0, 1, 2, 1))
+        self.assertEqual(line_counts(4, 0b0110, 3), (0, 0, 0, 0))
+        hits = line_counts.cache_info().hits
+        line_counts(6, 0, 3)
+        self.assertEqual(line_counts.cache_info().hits, hits + 1)
+
+    def test_placement_engine(self):
+        engine = PlacementEngine(4, blocked=[(1, 1)])
+        self.assertEqual(engine.count(4), 6)
+        board = ComputerBoard(4)
+        for index, (x, y, direction, length) in enumerate(engine.layout([4, 3, 2, 1]), 1):
+            board.place_battleships(length, x, y, direction, index)
+            self.assertNotEqual(board.get_cell(1, 1), index)
+        with self.assertRaises(ValueError):
+            engine.layout([5])
+        with self.assertRaises(ValueError):
+            engine.layout([4, 4, 4, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
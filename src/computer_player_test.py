@@ -0,0 +1,203 @@
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+from src.Service.computer_player import ComputerPlayer, default_opening_book
+from src.Service.monte_carlo_targeting import MonteCarloTargeting
+from src.Service.opening_book import OpeningBook
+from src.Service.placement_habits import PlacementHabits
+from src.Service.self_play import run_self_play
+from src.Service.target_queue import TargetQueue
+from src.board.board import Board, PlayerBoard, ComputerBoard
+from src.board.placement import PlacementEngine
+
+try:
+    from src.Service.batch_simulation import BatchSimulation
+except ImportError:
+    BatchSimulation = None
+
+
+def setUpModule():
+    # The openings are written to a directory of the tests rather than the user's cache
+    directory = tempfile.TemporaryDirectory()
+    unittest.addModuleCleanup(directory.cleanup)
+    environ = patch.dict(os.environ, BATTLESHIPS_CACHE_DIR=directory.name)
+    environ.start()
+    unittest.addModuleCleanup(environ.stop)
+    default_opening_book.cache_clear()
+    unittest.addModuleCleanup(default_opening_book.cache_clear)
+
+
+class TestComputerPlayer(unittest.TestCase):
+
+    def setUp(self):
+        self.player_board = PlayerBoard(8)
+        for index, (x, y, direction, length) in enumerate(PlacementEngine(8).layout([4, 3, 3, 2]), 1):
+            Board.place_battleships(self.player_board, length, x, y, direction, index)
+        self.game = Mock()
+        self.game.computer_hits = 0
+        self.game.computer_misses = 0
+
+    def play_until_game_over(self, strategy: str, move_time: float = None, strategy_options: dict = None):
+        computer = ComputerPlayer(ComputerBoard(8), strategy, move_time, strategy_options)
+        computer.place_battleships(4, [4, 3, 3, 2])
+        shots = 0
+        while not self.player_board.check_game_over():
+            computer.play(self.player_board, self.game)
+            shots += 1
+            self.assertLessEqual(shots, 64)
+        computer.close()
+        return computer
+
+    def test_weighted_targeting(self):
+        self.play_until_game_over("weighted")
+        self.assertEqual(self.game.computer_hits, 12)
+
+    def test_density_targeting(self):
+        self.play_until_game_over("density")
+        self.assertEqual(self.game.computer_hits, 12)
+
+    def test_monte_carlo_targeting(self):
+        self.play_until_game_over("monte_carlo", strategy_options={"samples": 50})
+        self.assertEqual(self.game.computer_hits, 12)
+
+    def test_move_time(self):
+        # A large sample budget is cut short by the move time
+        computer = self.play_until_game_over("monte_carlo", 0.05, {"samples": 100000})
+        self.assertEqual(self.game.computer_hits, 12)
+        self.assertLess(max(computer.move_times), 0.5)
+
+    def test_move_time_with_fallback(self):
+        # No layout covers the hit, so the fallback sampling only gets the time the first one left
+        targeting = MonteCarloTargeting(8, samples=10 ** 7, time_limit=0.2)
+        start = time.perf_counter()
+        move = targeting.best([4], [(1, 0), (0, 1)], [(0, 0)])
+        self.assertLess(time.perf_counter() - start, 0.3)
+        self.assertIsNotNone(move)
+
+    def test_target_queue(self):
+        queue = TargetQueue(8)
+        fired = {(3, 3), (4, 3), (3, 2)}
+        queue.add_hit(3, 3, fired)
+        queue.add_hit(4, 3, fired)
+        self.assertEqual(len(queue), 5)
+        fired.add((2, 3))
+        self.assertEqual(queue.pop(fired), (3, 4))
+        self.assertEqual(queue.pop(fired), (5, 3))
+        self.assertEqual(queue.pop(fired), (4, 2))
+        self.assertEqual(queue.pop(fired), (4, 4))
+        self.assertIsNone(queue.pop(fired))
+
+    def test_resume(self):
+        board = PlayerBoard(8)
+        board.place_battleships(2, 0, 0, "h", 1)
+        board.place_battleships(3, 4, 5, "h", 2)
+        for x, y in ((1, 0), (7, 7), (5, 5), (0, 0)):
+            board.check_hit(x, y)
+        computer = ComputerPlayer(ComputerBoard(8), "density")
+        computer.place_battleships(2, [2, 3])
+        computer.resume(board)
+        # The sunk ship is not fired around, the hit ship is finished off
+        x, y, _ = computer.fire(board)
+        self.assertIn((x, y), {(4, 5), (6, 5), (5, 4), (5, 6)})
+        while not board.check_ship_sunk(2):
+            x, y, _ = computer.fire(board)
+            self.assertNotIn((x, y), {(2, 0), (0, 1), (1, 1)})
+
+    def test_self_play(self):
+        report = run_self_play(20, 8, [4, 3, 3, 2], ("weighted", "density"), workers=1, chunk_size=8, seed=1)
+        self.assertEqual(sum(report.wins), 20)
+        self.assertEqual(sum(report.histogram.values()), 20)
+        self.assertTrue(12 <= report.mean_shots <= 64)
+        self.assertEqual(report, run_self_play(20, 8, [4, 3, 3, 2], ("weighted", "density"), workers=1,
+                                               chunk_size=8, seed=1)._replace(seconds=report.seconds))
+
+    @unittest.skipIf(BatchSimulation is None, "numpy is not installed")
+    def test_batch_simulation(self):
+        simulation = BatchSimulation(2000, 8, [4, 3, 3, 2], seed=1)
+        self.assertTrue(((simulation.ships > 0).sum(axis=(1, 2)) == 12).all())
+        shots = simulation.run()
+        self.assertTrue(simulation.game_over.all())
+        self.assertTrue(((shots >= 12) & (shots <= 64)).all())
+
+        # The batched games agree with the same strategy played by ComputerPlayer
+        object_shots = []
+        for _ in range(300):
+            board = ComputerBoard(8)
+            ComputerPlayer(board).place_battleships(4, [4, 3, 3, 2])
+            computer = ComputerPlayer(ComputerBoard(8), "parity")
+            while not board.check_game_over():
+                computer.fire(board)
+            object_shots.append(len(computer.move_times))
+        self.assertAlmostEqual(shots.mean(), sum(object_shots) / len(object_shots), delta=3)
+
+        # Fleets that never fit are refused rather than restarted forever
+        for size, fleet in ((3, [3, 3, 3, 3]), (3, [4]), (5, [5, 5, 5, 3, 3, 3])):
+            with self.assertRaises(ValueError):
+                BatchSimulation(1, size, fleet, max_restarts=10)
+
+    def test_opening_book(self):
+        with tempfile.TemporaryDirectory() as directory:
+            book = OpeningBook(directory, max_entries=2, length=8)
+            opening = book.get("density", 8, [4, 3, 3, 2])
+            self.assertEqual(len(set(opening)), 8)
+            self.assertIsNone(book.get("weighted", 8, [4, 3, 3, 2]))
+            self.assertIsNone(book.get("density", 8, []))
+            self.assertEqual(len(os.listdir(directory)), 1)
+            self.assertEqual(OpeningBook(directory, length=8).get("density", 8, [2, 3, 3, 4]), opening)
+
+            # The computer follows the opening, in some orientation, until a shot hits
+            computer = ComputerPlayer(ComputerBoard(8), "density", opening_book=book)
+            computer.place_battleships(4, [4, 3, 3, 2])
+            x, y, _ = computer.fire(PlayerBoard(8))
+            orientations = set()
+            for a, b in ((opening[0] % 8, opening[0] // 8), (opening[0] // 8, opening[0] % 8)):
+                orientations |= {(a, b), (7 - a, b), (a, 7 - b), (7 - a, 7 - b)}
+            self.assertIn((x, y), orientations)
+
+            # The least recently used opening is evicted, openings served from memory count as used
+            time.sleep(0.01)
+            book.get("density", 10, [4, 3, 3, 2])
+            time.sleep(0.01)
+            book.get("density", 8, [4, 3, 3, 2])
+            time.sleep(0.01)
+            book.get("density", 12, [4, 3, 3, 2])
+            names = sorted(name.split("-")[1] for name in os.listdir(directory))
+            self.assertEqual(names, ["12", "8"])
+
+    def test_placement_habits(self):
+        habits = PlacementHabits(8)
+        self.assertIsNone(habits.prior())
+        for _ in range(10):
+            habits.record(self.player_board.get_placements)
+        with tempfile.TemporaryDirectory() as directory:
+            with ThreadPoolExecutor(8) as executor:
+                list(executor.map(lambda _: habits.save("tester", directory), range(32)))
+            self.assertEqual(os.listdir(directory), [os.path.basename(PlacementHabits.path("tester", 8, directory))])
+            self.assertEqual(os.path.getsize(PlacementHabits.path("tester", 8, directory)), 12 + 2 * 64)
+            loaded = PlacementHabits.load("tester", 8, directory)
+            self.assertEqual(PlacementHabits.load("someone", 8, directory).games, 0)
+        self.assertEqual(loaded.games, 10)
+        prior = loaded.prior()
+        self.assertAlmostEqual(sum(prior) / len(prior), 1)
+        ship_cells = {y * 8 + x for x in range(8) for y in range(8) if self.player_board.get_cell(y, x) > 0}
+        self.assertGreater(min(prior[cell] for cell in ship_cells), max(prior[cell] for cell in range(64)
+                                                                        if cell not in ship_cells))
+        with self.assertRaises(ValueError):
+            PlacementHabits.path("../escape", 8)
+
+        # Against the same placements again, the habits point the first shot at a ship
+        computer = ComputerPlayer(ComputerBoard(8), "density", habits=loaded)
+        computer.place_battleships(4, [4, 3, 3, 2])
+        self.assertTrue(computer.fire(self.player_board)[2].hit)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            ComputerPlayer(ComputerBoard(8), "psychic")
+
+
+if __name__ == '__main__':
+    unittest.main()
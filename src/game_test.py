@@ -1,26 +1,80 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
 import unittest
-from unittest.mock import Mock, patch
+from dataclasses import replace
+from unittest.mock import Mock, patch, mock_open
+from src.Service.computer_player import default_opening_book
+from src.Service.config import GameConfig, config_from_args, get_config, load_config, parse_settings
+from src.Service.engine import (Action, Event, GameEngine, COMPUTER, FIRE, GAME_OVER, OVER, PLACE, PLACING, PLAYING,
+                                PLAYER, SHOT)
+from src.Service.move_log import open_move_log, read_games
+from src.Service.replay import reconstruct, rerun
 from src.Service.game import Game, get_board_size, get_battleships, get_battle_ship_length
 from src.board.board import PlayerBoard, ComputerBoard
 from src.ui.ui_interface import UiInterface
 
+SETTINGS = "ui=console\nboard_size=10\nbattleships=5\nbattle_ship_length=2,3,3,4,5\n"
+CONFIG = GameConfig(ui='console', board_size=10, battleships=5, battle_ship_length=(2, 3, 3, 4, 5), player_profile='')
+
+
+def setUpModule():
+    # The openings are written to a directory of the tests rather than the user's cache
+    directory = tempfile.TemporaryDirectory()
+    unittest.addModuleCleanup(directory.cleanup)
+    environ = patch.dict(os.environ, BATTLESHIPS_CACHE_DIR=directory.name)
+    environ.start()
+    unittest.addModuleCleanup(environ.stop)
+    default_opening_book.cache_clear()
+    unittest.addModuleCleanup(default_opening_book.cache_clear)
+
+
 class TestGame(unittest.TestCase):
 
     def setUp(self):
         self.ui = Mock(spec=UiInterface)
-        with patch('src.Service.game.get_board_size', return_value=10), \
-            patch('src.Service.game.get_battleships', return_value=5), \
-            patch('src.Service.game.get_battle_ship_length', return_value=[2, 3, 3, 4, 5]):
-            self.game = Game(self.ui)
+        self.game = Game(self.ui, CONFIG)
+
+    def place_player_fleet(self):
+        for row, length in enumerate(self.game.engine.ships_to_place):
+            self.game.engine.apply(Action.place(0, row, 'Horizontal', length))
+
+    def patch_settings(self, text: str = SETTINGS):
+        # get_config caches the settings it read, they are read again from the patched file
+        get_config.cache_clear()
+        self.addCleanup(get_config.cache_clear)
+        settings = patch('builtins.open', mock_open(read_data=text))
+        self.addCleanup(settings.stop)
+        return settings.start()
 
     def test_get_board_size(self):
-        self.assertEqual(get_board_size(), 10)  # Assuming the board size is 10 in settings.properties
+        self.patch_settings()
+        self.assertEqual(get_board_size(), 10)
 
     def test_get_battleships(self):
-        self.assertEqual(get_battleships(), 5)  # Assuming the number of battleships is 5 in settings.properties
+        self.patch_settings()
+        self.assertEqual(get_battleships(), 5)
 
     def test_get_battle_ship_length(self):
-        self.assertEqual(get_battle_ship_length(), [2, 3, 3, 4, 5])  # Assuming these lengths in settings.properties
+        settings = self.patch_settings()
+        self.assertEqual(get_battle_ship_length(), [2, 3, 3, 4, 5])
+        self.assertEqual((get_board_size(), get_battleships()), (10, 5))
+        settings.assert_called_once()
+
+    @patch('builtins.open', mock_open(read_data="board_size = 8  # comment\nbattleships=3\nplayer_profile=\n"))
+    def test_config_overrides(self):
+        config = load_config(environ={'BATTLESHIPS_BATTLESHIPS': '4', 'BATTLESHIPS_UI': 'console'})
+        self.assertEqual((config.ui, config.board_size, config.battleships, config.player_profile),
+                         ('console', 8, 4, ''))
+        config = config_from_args(['--board-size', '12', '--battle-ship-length', '2,2'])
+        self.assertEqual((config.board_size, config.battle_ship_length), (12, (2, 2)))
+        with self.assertRaises(ValueError):
+            parse_settings("board_size=big")
+        with self.assertRaises(ValueError):
+            GameConfig(ai_strategy='psychic')
 
     def test_place_player_ship(self):
         self.ui.get_placement.return_value = (0, 0, 'Horizontal', 3)
@@ -31,19 +85,45 @@ class TestGame(unittest.TestCase):
 
     def test_place_computer_battleships(self):
         self.game.place_computer_battleships()
-        self.assertEqual(len(self.game.computer_board.ships), 5)  # Assuming 5 ships
+        self.assertEqual(self.game.computer_board.get_ship_count, 5)
 
     def test_player_play_hit(self):
         self.ui.get_play_coordinates.return_value = (0, 0)
         self.game.computer_board.place_battleships(3, 0, 0, 'Horizontal', 1)
+        self.place_player_fleet()
         self.game.player_play()
         self.assertEqual(self.game.computer_board.get_cell(0, 0), ComputerBoard.HIT)
 
     def test_player_play_miss(self):
         self.ui.get_play_coordinates.return_value = (0, 0)
+        self.game.computer_board.place_battleships(3, 5, 5, 'Horizontal', 1)
+        self.place_player_fleet()
         self.game.player_play()
         self.assertEqual(self.game.computer_board.get_cell(0, 0), ComputerBoard.MISS)
 
+    def test_player_play_retries_without_recursion(self):
+        self.ui.get_play_coordinates.return_value = (0, 0)
+        self.game.computer_board.place_battleships(3, 5, 5, 'Horizontal', 1)
+        self.place_player_fleet()
+        self.game.player_play()
+        # More rejected shots than the recursion limit
+        self.ui.get_play_coordinates.side_effect = [(0, 0)] * 2000 + [(10, 0)] * 2000 + [(1, 1)]
+        self.game.player_play()
+        self.assertEqual(self.ui.print_exception.call_count, 4000)
+        self.assertEqual(self.game.computer_board.get_cell(1, 1), ComputerBoard.MISS)
+
+    def test_save_and_load(self):
+        self.ui.get_play_coordinates.return_value = (0, 0)
+        self.game.computer_board.place_battleships(3, 0, 0, 'Horizontal', 1)
+        self.place_player_fleet()
+        self.game.player_play()
+        loaded = Game(self.ui, CONFIG)
+        loaded.load_bytes(self.game.to_bytes())
+        self.assertEqual(loaded.computer_board.get_cell(0, 0), ComputerBoard.HIT)
+        self.assertEqual(loaded.computer_board.get_cell(1, 0), 1)
+        self.assertEqual(loaded.computer_board.zobrist_hash, self.game.computer_board.zobrist_hash)
+        self.assertEqual(loaded.to_bytes(), self.game.to_bytes())
+
     def test_game_over(self):
         self.game.computer_board.place_battleships(3, 0, 0, 'Horizontal', 1)
         self.game.computer_board.place_battleships(3, 1, 0, 'Horizontal', 2)
@@ -52,8 +132,117 @@ class TestGame(unittest.TestCase):
         self.game.computer_board.place_battleships(3, 4, 0, 'Horizontal', 5)
         for i in range(5):
             for j in range(3):
-                self.game.computer_board.hit(i, j)
+                self.game.computer_board.check_hit(i, j)
         self.assertTrue(self.game.computer_board.check_game_over())
 
+    def test_game_imports_without_pygame(self):
+        code = 'import sys, src.Service.game, src.Service.self_play; print("pygame" in sys.modules)'
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), 'False')
+
+
+class TestGameEngine(unittest.TestCase):
+
+    def test_game_driven_by_actions(self):
+        engine = GameEngine(CONFIG)
+        self.assertEqual(engine.phase, PLACING)
+        with self.assertRaises(ValueError):
+            engine.apply(Action.fire(0, 0))
+        while engine.phase == PLACING:
+            action = next(engine.legal_actions())
+            self.assertEqual(action.kind, PLACE)
+            engine.apply(action)
+        self.assertEqual(engine.computer_board.get_ship_count, 5)
+        with self.assertRaises(ValueError):
+            engine.apply(Action.place(0, 0, 'h', 2))
+        events = []
+        while engine.phase == PLAYING:
+            action = next(engine.legal_actions())
+            self.assertEqual(action.kind, FIRE)
+            events += engine.apply(action)
+        self.assertEqual(engine.phase, OVER)
+        self.assertEqual(events[-1].kind, GAME_OVER)
+        self.assertEqual(events[-1].player, engine.winner)
+        self.assertEqual(list(engine.legal_actions()), [])
+        shots = [event for event in events if event.kind == SHOT and event.player == PLAYER]
+        self.assertEqual(len(shots), engine.player_hits + engine.player_misses)
+        self.assertEqual(Event(*json.loads(json.dumps(shots[0]))), shots[0])
+        self.assertEqual(Action(*json.loads(json.dumps(action))), action)
+
+    def test_illegal_action_changes_nothing(self):
+        engine = GameEngine(CONFIG)
+        state = engine.to_bytes()
+        for action in (Action.place(9, 0, 'h', 5), Action.place(0, 0, 'diagonal', 2), Action.place(0, 0, 'h', 7),
+                       Action('jump', 0, 0)):
+            with self.assertRaises(ValueError):
+                engine.apply(action)
+        self.assertEqual(engine.to_bytes(), state)
+        self.assertEqual(len(list(engine.legal_actions())), 2 * (9 + 8 + 7 + 6) * 10)
+
+    def test_computer_fleet_that_does_not_fit(self):
+        engine = GameEngine(CONFIG)
+        for row, length in enumerate(engine.ships_to_place[:-1]):
+            engine.apply(Action.place(0, row, 'h', length))
+        state = engine.to_bytes()
+        last = Action.place(0, 9, 'h', engine.ships_to_place[-1])
+        with patch('src.Service.computer_player.PlacementEngine.layout', side_effect=ValueError("No room")):
+            with self.assertRaises(ValueError):
+                engine.apply(last)
+        self.assertEqual(engine.to_bytes(), state)
+        self.assertEqual(engine.phase, PLACING)
+        engine.apply(last)
+        self.assertEqual(engine.phase, PLAYING)
+        self.assertEqual(engine.computer_board.get_ship_count, 5)
+
+    def test_move_log_replays_resumed_game(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'moves.log')
+            config = replace(CONFIG, move_log=path)
+            engine = GameEngine(config)
+            for _ in range(len(engine.ships_to_place) + 10):
+                engine.apply(next(engine.legal_actions()))
+            resumed = GameEngine(config)
+            resumed.load_bytes(engine.to_bytes())
+            while resumed.phase == PLAYING:
+                resumed.apply(next(resumed.legal_actions()))
+            with open(path, 'ab') as f:
+                # A record cut short by a crash
+                f.write(b'\x0f\x00\x00\x00\x03')
+            first, second = read_games(path).values()
+            self.assertEqual(len(first.shots), 20)
+            self.assertIsNone(reconstruct(first).winner)
+            result = reconstruct(second)
+            self.assertEqual(result.winner, resumed.winner)
+            self.assertEqual(result.player_shots, resumed.player_hits + resumed.player_misses)
+            self.assertEqual(result.computer_board.zobrist_hash, resumed.computer_board.zobrist_hash)
+            second.shots[0] = (0, second.shots[0][1], 3 - second.shots[0][2] % 2)
+            with self.assertRaises(ValueError):
+                reconstruct(second)
+            open_move_log(path).close()
+
+    def test_rerun_reproduces_logged_games(self):
+        rng = random.Random(1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'moves.log')
+            config = replace(CONFIG, move_log=path, ai_strategy='density')
+            for _ in range(5):
+                engine = GameEngine(config)
+                while engine.phase == PLACING:
+                    engine.apply(rng.choice(list(engine.legal_actions())))
+                while engine.phase == PLAYING:
+                    engine.apply(next(engine.legal_actions()))
+                engine.close()
+            open_move_log(path).close()
+            results = [(log, reconstruct(log)) for log in read_games(path).values()]
+        self.assertEqual(len(results), 5)
+        for log, result in results:
+            if result.winner == COMPUTER:
+                # The logged seed makes the computer fire the same shots again
+                self.assertEqual(rerun(result, log.strategy, log.move_time), result.computer_shots)
+        # The strategies know the fleet they hunt, so density beats weighted
+        density = [rerun(result, 'density', seed=seed) for _, result in results for seed in range(4)]
+        weighted = [rerun(result, 'weighted', seed=seed) for _, result in results for seed in range(4)]
+        self.assertLess(sum(density) / len(density) + 5, sum(weighted) / len(weighted))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
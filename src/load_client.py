@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from typing import NamedTuple
+
+from src.Service.server import DEFAULT_PORT
+
+
+class LoadReport(NamedTuple):
+    """
+    The outcome of a load run. latencies holds the seconds every shot took to be answered, sorted, and
+    server_cpu_seconds the processor time the server spent meanwhile.
+    """
+    games: int
+    seconds: float
+    latencies: list
+    server_cpu_seconds: float
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else float("inf")
+
+    @property
+    def games_per_core_second(self) -> float:
+        return self.games / self.server_cpu_seconds if self.server_cpu_seconds else float("inf")
+
+    def percentile(self, fraction: float) -> float:
+        if not self.latencies:
+            return 0.0
+        return self.latencies[min(len(self.latencies) - 1, int(fraction * len(self.latencies)))]
+
+
+class Connection:
+    """
+    A connection to a game server, answering one request at a time
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.__reader = reader
+        self.__writer = writer
+
+    @classmethod
+    async def open(cls, host: str, port: int) -> "Connection":
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def call(self, request: dict) -> dict:
+        """
+        Send a request and wait for its response
+        :param request: The request
+        :type request: dict
+        :return: The response
+        :rtype: dict
+        :raises RuntimeError: If the server refused the request or closed the connection
+        """
+        self.__writer.write(json.dumps(request).encode() + b"\n")
+        await self.__writer.drain()
+        line = await self.__reader.readline()
+        if not line:
+            raise RuntimeError("Connection closed by the server")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise RuntimeError(f"Server error: {response['error']}")
+        return response
+
+    async def close(self) -> None:
+        self.__writer.close()
+        await self.__writer.wait_closed()
+
+
+async def _stats(host: str, port: int) -> dict:
+    # A connection of its own, as one left idle during the run would time out
+    connection = await Connection.open(host, port)
+    try:
+        return await connection.call({"op": "stats"})
+    finally:
+        await connection.close()
+
+
+async def play_session(connection: Connection, options: dict, rng: random.Random, latencies: list) -> str:
+    """
+    Play a whole game on the server, placing the ships one per row and firing at random cells
+    :param connection: The connection to play on
+    :type connection: Connection
+    :param options: The options of the game, see SESSION_OPTIONS
+    :type options: dict
+    :param rng: The random generator of the shots
+    :type rng: random.Random
+    :param latencies: The seconds every shot took are appended to it
+    :type latencies: list
+    :return: The winner
+    :rtype: str
+    """
+    new = await connection.call({"op": "new", "options": options})
+    session = new["session"]
+    for row, length in enumerate(new["ships_to_place"]):
+        await connection.call({"op": "place", "session": session, "x": 0, "y": row, "direction": "h",
+                               "length": length})
+    size = new["board_size"]
+    cells = list(range(size * size))
+    rng.shuffle(cells)
+    winner = None
+    for cell in cells:
+        start = time.perf_counter()
+        response = await connection.call({"op": "fire", "session": session, "x": cell % size, "y": cell // size})
+        latencies.append(time.perf_counter() - start)
+        if response["phase"] == "over":
+            winner = response["events"][-1]["player"]
+            break
+    await connection.call({"op": "close", "session": session})
+    return winner
+
+
+async def run_load(host: str, port: int, games: int, concurrency: int, options: dict = None,
+                   seed: int = None) -> LoadReport:
+    """
+    Play games on a server with concurrency sessions at a time, each on its own connection
+    :param host: The address of the server
+    :type host: str
+    :param port: The port of the server
+    :type port: int
+    :param games: The number of games to play
+    :type games: int
+    :param concurrency: The number of sessions played at once
+    :type concurrency: int
+    :param options: The options of the games, see SESSION_OPTIONS
+    :type options: dict
+    :param seed: The seed of the shots, None for a random one
+    :type seed: int
+    :return: The report
+    :rtype: LoadReport
+    """
+    rng = random.Random(seed)
+    latencies = []
+    remaining = [games]
+
+    async def player():
+        connection = await Connection.open(host, port)
+        try:
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                await play_session(connection, options or {}, rng, latencies)
+        finally:
+            await connection.close()
+
+    before = await _stats(host, port)
+    start = time.perf_counter()
+    await asyncio.gather(*(player() for _ in range(min(concurrency, games))))
+    seconds = time.perf_counter() - start
+    after = await _stats(host, port)
+    latencies.sort()
+    return LoadReport(games, seconds, latencies, after["cpu_seconds"] - before["cpu_seconds"])
+
+
+def format_report(report: LoadReport) -> str:
+    return (f"{report.games} games in {report.seconds:.2f}s: {report.games_per_second:.1f} games/s, "
+            f"{report.games_per_core_second:.1f} games per server CPU second\n"
+            f"{len(report.latencies)} shots: p50 {report.percentile(0.5) * 1000:.2f}ms, "
+            f"p99 {report.percentile(0.99) * 1000:.2f}ms, max {report.percentile(1.0) * 1000:.2f}ms")
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Play many games at once on a game server and time them",
+                                     epilog="With --spawn, other arguments are passed to the server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--spawn", action="store_true", help="Start a server on a free port for the run")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--board-size", type=int, default=None)
+    parser.add_argument("--ai-strategy", default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args, server_args = parser.parse_known_args(argv)
+    if server_args and not args.spawn:
+        parser.error(f"unrecognized arguments: {' '.join(server_args)}")
+    options = {name: value for name, value in (("board_size", args.board_size), ("ai_strategy", args.ai_strategy))
+               if value is not None}
+
+    server = None
+    port = args.port
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, "-m", "src.Service.server", "--host", args.host, "--port", "0",
+                                   *server_args], stdout=subprocess.PIPE, text=True)
+        line = server.stdout.readline()
+        if not line.startswith("Listening on port"):
+            server.wait()
+            print("The server did not start", file=sys.stderr)
+            return 1
+        port = int(line.split()[-1])
+    try:
+        report = asyncio.run(run_load(args.host, port, args.games, args.concurrency, options, args.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print(format_report(report))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+import asyncio
+import unittest
+
+from src.Service.config import GameConfig
+from src.Service.server import GameServer
+from src.load_client import Connection, run_load
+
+CONFIG = GameConfig(ui='console', board_size=10, battleships=5, battle_ship_length=(2, 3, 3, 4, 5), ai_move_time=0.5)
+
+
+class TestGameServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = GameServer(CONFIG, port=0, idle_timeout=0.2)
+        self.port = await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def test_load_client_plays_whole_games(self):
+        report = await run_load('127.0.0.1', self.port, games=6, concurrency=3, seed=1)
+        self.assertEqual(report.games, 6)
+        self.assertGreaterEqual(len(report.latencies), 6 * 17)
+        stats = await self.server.handle({'op': 'stats'})
+        self.assertEqual((stats['games'], stats['sessions']), (6, 0))
+
+    async def test_errors_and_idle_sessions(self):
+        connection = await Connection.open('127.0.0.1', self.port)
+        new = await connection.call({'op': 'new', 'options': {'board_size': 8}})
+        self.assertEqual((new['board_size'], new['phase']), (8, 'placing'))
+        session = new['session']
+        for request, error in (({'op': 'fire', 'session': session, 'x': 0, 'y': 0}, 'Ships must be placed first'),
+                               ({'op': 'place', 'session': session, 'x': '0', 'y': 0}, 'Invalid x'),
+                               ({'op': 'new', 'options': {'board_size': 1000}}, 'Invalid option board_size'),
+                               ({'op': 'new', 'options': {'storage': 'numpy'}}, 'Invalid option storage'),
+                               ({'op': 'state', 'session': 'nope', 'id': 7}, 'Unknown session')):
+            response = await self.server.handle(request)
+            self.assertEqual((response['ok'], response['error']), (False, error))
+        self.assertEqual(response['id'], 7)
+        state = (await connection.call({'op': 'state', 'session': session}))['state']
+        self.assertEqual(len(state['board']), 8)
+        self.assertTrue(all(cell == 0 for row in state['target'] for cell in row))
+        await connection.close()
+        # Closed by the server's reaper
+        await asyncio.sleep(0.3)
+        self.assertEqual((await self.server.handle({'op': 'stats'}))['sessions'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,8 +6,9 @@ from src.ui.ui_interface import UiInterface
 
 
 class ConsoleUI(UiInterface, ABC):
-    def __init__(self):
+    def __init__(self, config=None):
         super().__init__()
+        self.config = config
 
     def run(self, game):
         print("Welcome to Battleships!")
@@ -1,18 +1,20 @@
 import pygame
 from abc import ABC
-from src.Service.game import get_board_size
+from src.Service.config import GameConfig, get_config
 from src.board.board import Board
 from src.ui.ui_interface import UiInterface
 
 
 class PygameUI(UiInterface, ABC):
-    def __init__(self):
+    def __init__(self, config: GameConfig = None):
         """
         Initialize the PygameUI class.
+
+        :param config: GameConfig - The settings, defaults to the settings file of this process.
         """
         super().__init__()
         self.__game = None
-        self.__board_size = get_board_size()
+        self.__board_size = (config or get_config()).board_size
         self.__panel_size = 400  # Fixed panel size
         self.__cell_size = self.__panel_size // self.__board_size  # Calculate cell size based on board size
         self.__margin = 10
@@ -65,6 +67,12 @@ class PygameUI(UiInterface, ABC):
         pygame.display.flip()
         return self
 
+    def close(self):
+        """
+        Close the Pygame window.
+        """
+        pygame.quit()
+
     def __handle_events(self):
         """
         Handle Pygame events.
@@ -1,5 +1,27 @@
+import importlib
 from abc import abstractmethod, ABC
 
+# UI backends by settings name, imported only when selected so console games, tests and simulations
+# never import pygame
+UI_BACKENDS = {
+    'pygame': ('src.ui.pygame_ui', 'PygameUI'),
+    'console': ('src.ui.console_ui', 'ConsoleUI'),
+}
+
+
+def create_ui(name: str, config=None) -> 'UiInterface':
+    """
+    Import a UI backend and create it.
+
+    :param name: str - The name of the backend, one of UI_BACKENDS.
+    :param config: GameConfig - The settings passed to the backend.
+    :return: UiInterface - The UI.
+    """
+    if name not in UI_BACKENDS:
+        raise ValueError('Invalid ui setting')
+    module_name, class_name = UI_BACKENDS[name]
+    return getattr(importlib.import_module(module_name), class_name)(config)
+
 
 class UiInterface(ABC):
     def __init__(self):
@@ -39,4 +61,10 @@ class UiInterface(ABC):
 
     @abstractmethod
     def print_exception(self, e):
+        pass
+
+    def close(self):
+        """
+        Release the resources of the UI when the game is over.
+        """
         pass
\ No newline at end of file